@@ -1,11 +1,22 @@
-from flask import Flask, jsonify, request, send_file, abort
+from flask import Flask, jsonify, request, abort, make_response
 from flask_cors import CORS
 import json
 import os
-from optimizer import RouteOptimizer
+import gzip
+import threading
+from optimizer import RouteOptimizer, routes_from_details
 from visualizer import RouteVisualizer
-import pandas as pd
-from datetime import datetime
+from point_store import PointStore, PointCache, source_signature
+from spatial_index import SpatialIndex
+from road_network import RoadNetwork
+from matrix_cache import MatrixCache
+from solution_cache import SolutionCache
+from map_cache import MapCache
+from route_index import RouteIndex
+from jobs import optimization_job
+from job_manager import JobManager
+from time_windows import parse_time
+from osm_source import load_osm_data
 
 app = Flask(__name__)
 CORS(app)
@@ -13,45 +24,140 @@ CORS(app)
 CHATEAU_COORDS = (48.45038746219548, -2.0447748346342434)
 MAX_DISTANCE_KM = 15
 GEOJSON_FILE = 'dinan_osm_data.geojson'
-
-optimizer = RouteOptimizer(CHATEAU_COORDS, MAX_DISTANCE_KM)
+POINTS_CACHE_FILE = 'points_cache.json'
+POINTS_STORE_DIR = 'points_store'
+SOLUTION_CACHE_DIR = 'solution_cache'
+ROAD_NETWORK_DIR = 'road_network'
+MATRIX_CACHE_DIR = 'matrix_cache'
+MAP_CACHE_DIR = 'map_cache'
+ROUTES_EXPORT_FILE = 'routes_optimisees.csv'
+# Au-delà, la carte charge les points par emprise visible via /api/points?bbox=
+MAP_VIEWPORT_THRESHOLD = 500
+
+matrix_cache = MatrixCache(MATRIX_CACHE_DIR)
 visualizer = RouteVisualizer(CHATEAU_COORDS, MAX_DISTANCE_KM)
+solution_cache = SolutionCache(max_entries=32, cache_dir=SOLUTION_CACHE_DIR)
+jobs = JobManager(max_workers=2, ttl_seconds=3600)
 
 
-def validate_time_window(time_str):
-    """Valide si une heure est dans la fenêtre 8h-12h ou 14h-16h"""
-    try:
-        time = datetime.strptime(time_str, "%H:%M").time()
-        morning_start = datetime.strptime("08:00", "%H:%M").time()
-        morning_end = datetime.strptime("12:00", "%H:%M").time()
-        afternoon_start = datetime.strptime("14:00", "%H:%M").time()
-        afternoon_end = datetime.strptime("16:00", "%H:%M").time()
+def read_source_points(source_file):
+    """Lit et valide les points depuis le GeoJSON OSM ou l'ancien cache JSON"""
+    if source_file == GEOJSON_FILE:
+        points = load_osm_data(
+            GEOJSON_FILE, CHATEAU_COORDS, MAX_DISTANCE_KM)
+    else:
+        with open(source_file, 'r') as f:
+            points = json.load(f)
+
+    for point in points:
+        if not all(key in point for key in ['id', 'lat', 'lon', 'passengers', 'arrival_time']):
+            raise ValueError(f"Point invalide: {point}")
+        # Une heure hors des créneaux est conservée : le pré-contrôle la signale
+        try:
+            parse_time(point['arrival_time'])
+        except (AttributeError, ValueError):
+            raise ValueError(f"Heure d'arrivée invalide: {point}")
+
+    return points
+
+
+def points_source_file():
+    """Retourne le fichier source des points : le cache JSON s'il existe, sinon le GeoJSON OSM"""
+    return POINTS_CACHE_FILE if os.path.exists(POINTS_CACHE_FILE) else GEOJSON_FILE
+
+
+def load_point_store():
+    """Ouvre le stock binaire des points, reconstruit si le fichier source a changé"""
+    source_file = points_source_file()
+    store = PointStore.open(POINTS_STORE_DIR, source_file)
+    if store is None:
+        store = PointStore.build(
+            POINTS_STORE_DIR, source_file, read_source_points(source_file))
+    return store
+
+
+points_cache = PointCache(lambda: load_point_store().to_points())
+
+
+_points_index = {'points': None, 'index': None}
+_points_index_lock = threading.Lock()
 
-        return (morning_start <= time <= morning_end) or (afternoon_start <= time <= afternoon_end)
+
+def load_points_index():
+    """Retourne les points validés et leur index spatial, reconstruit quand les points changent"""
+    points = load_points()
+    with _points_index_lock:
+        if _points_index['points'] is not points:
+            _points_index['index'] = SpatialIndex.from_points(points)
+            _points_index['points'] = points
+        return points, _points_index['index']
+
+
+def read_bbox(value):
+    """Lit une emprise min_lat,min_lon,max_lat,max_lon"""
+    try:
+        min_lat, min_lon, max_lat, max_lon = map(float, value.split(','))
     except ValueError:
-        return False
+        abort(400, description="bbox attendu : min_lat,min_lon,max_lat,max_lon")
+    if min_lat > max_lat or min_lon > max_lon:
+        abort(400, description="bbox invalide : minimum supérieur au maximum")
+    return min_lat, min_lon, max_lat, max_lon
+
+
+_road_network = {'network': None, 'signature': None, 'building': False}
+_road_network_lock = threading.Lock()
+
+
+def _build_road_network(signature):
+    try:
+        network = RoadNetwork.load(ROAD_NETWORK_DIR, GEOJSON_FILE)
+    except Exception as e:
+        app.logger.error(f"Réseau routier indisponible, distances haversine utilisées : {str(e)}")
+        network = None
+    with _road_network_lock:
+        _road_network.update(network=network, signature=signature, building=False)
+
+
+def refresh_road_network():
+    """
+    Reconstruit le réseau routier en arrière-plan si le GeoJSON a changé
+
+    Returns:
+        threading.Thread: Le thread de construction lancé, ou None
+    """
+    if not os.path.exists(GEOJSON_FILE):
+        with _road_network_lock:
+            _road_network.update(network=None, signature=None)
+        return None
+    signature = source_signature(GEOJSON_FILE)
+    with _road_network_lock:
+        if _road_network['building'] or _road_network['signature'] == signature:
+            return None
+        _road_network['building'] = True
+    thread = threading.Thread(target=_build_road_network, args=(signature,), daemon=True)
+    thread.start()
+    return thread
+
+
+def load_road_network():
+    """
+    Réseau routier courant, sans construction sur le chemin de la requête
+
+    Retourne None sans GeoJSON, pendant la première construction ou si elle a
+    échoué : les distances haversine sont alors utilisées. Pendant une
+    reconstruction, le réseau précédent reste servi.
+    """
+    refresh_road_network()
+    return _road_network['network']
+
+
+refresh_road_network()
 
 
 def load_points():
-    """Charge et valide les points depuis le cache ou OSM"""
+    """Charge les points validés depuis le cache mémoire ou le stock binaire"""
     try:
-        if os.path.exists('points_cache.json'):
-            with open('points_cache.json', 'r') as f:
-                points = json.load(f)
-        else:
-            from script import load_osm_data
-            points = load_osm_data(
-                GEOJSON_FILE, CHATEAU_COORDS, MAX_DISTANCE_KM)
-            with open('points_cache.json', 'w') as f:
-                json.dump(points, f)
-
-        for point in points:
-            if not all(key in point for key in ['id', 'lat', 'lon', 'passengers', 'arrival_time']):
-                raise ValueError(f"Point invalide: {point}")
-            if not validate_time_window(point['arrival_time']):
-                point['arrival_time'] = "08:00"
-
-        return points
+        return points_cache.get(points_source_file())
     except Exception as e:
         app.logger.error(f"Erreur lors du chargement des points: {str(e)}")
         raise
@@ -69,9 +175,97 @@ def handle_error(error):
 
 @app.route('/api/points', methods=['GET'])
 def get_points():
+    bbox = request.args.get('bbox')
+    if bbox is not None:
+        bbox = read_bbox(bbox)
     try:
-        points = load_points()
-        return jsonify(points)
+        if bbox is None:
+            return jsonify(load_points())
+        points, index = load_points_index()
+        return jsonify([points[i] for i in index.query_bbox(*bbox)])
+    except Exception as e:
+        abort(500, description=str(e))
+
+
+@app.route('/api/stats', methods=['GET'])
+def get_stats():
+    return jsonify({
+        'points_cache': points_cache.stats(),
+        'solution_cache': solution_cache.stats(),
+        'matrix_cache': matrix_cache.stats(),
+        'map_cache': map_cache.stats()
+    })
+
+
+def read_optimize_config(config):
+    """Borne les paramètres d'optimisation reçus (chauffeurs, capacité, rayon)"""
+    num_drivers = min(max(1, config.get('num_drivers', 3)), 5)
+    capacity = min(max(4, config.get('capacity_per_driver', 8)), 12)
+    max_distance = min(max(5, config.get('max_distance_km', 15)), 20)
+    return num_drivers, capacity, max_distance
+
+
+route_index = RouteIndex(ROUTES_EXPORT_FILE)
+route_index.load_export()
+
+
+def publish_solution(solution_id, solution):
+    """Publie une solution comme solution courante (itinéraires par chauffeur, carte de /api/map)"""
+    route_index.publish(solution_id, solution['routes_details'])
+
+
+def render_map(solution_id):
+    """Rend la carte d'une solution du cache (None si la solution est inconnue)"""
+    solution = solution_cache.get(solution_id)
+    if solution is None or 'points' not in solution:
+        return None
+    # Points de la solution : le fichier source a pu changer depuis
+    points = solution['points']
+    routes = solution['response']['routes']
+    if len(points) > MAP_VIEWPORT_THRESHOLD:
+        map_viz = visualizer.create_map(points, routes, points_url='/api/points')
+    else:
+        map_viz = visualizer.create_map(points, routes, compact=True)
+    return map_viz.get_root().render()
+
+
+map_cache = MapCache(render_map, MAP_CACHE_DIR)
+# Une carte vit aussi longtemps que sa solution dans le cache LRU
+solution_cache.on_evict = map_cache.invalidate
+map_cache.retain(solution_cache.keys())
+
+
+def map_url(solution_id):
+    return f"/api/map/{solution_id}"
+
+
+def build_optimizer(num_drivers, capacity, max_distance, road_network):
+    """
+    Optimiseur propre à une requête : sa configuration ne peut pas être modifiée
+    par une requête concurrente. Seuls le cache de matrices et le réseau routier
+    sont partagés.
+    """
+    request_optimizer = RouteOptimizer(CHATEAU_COORDS, max_distance, num_drivers, capacity)
+    request_optimizer.matrix_cache = matrix_cache
+    request_optimizer.road_network = road_network
+    return request_optimizer
+
+
+def infeasible_response(diagnostic):
+    return jsonify({
+        'error': diagnostic['issues'][0]['message'],
+        'type': 'InfeasibleProblem',
+        'diagnostic': diagnostic
+    }), 400
+
+
+@app.route('/api/prescreen', methods=['POST'])
+def prescreen_problem():
+    try:
+        config = request.json or {}
+        num_drivers, capacity, max_distance = read_optimize_config(config)
+        return jsonify(build_optimizer(
+            num_drivers, capacity, max_distance, load_road_network()).prescreen(load_points()))
     except Exception as e:
         abort(500, description=str(e))
 
@@ -81,16 +275,30 @@ def optimize_routes():
     try:
         config = request.json or {}
 
-        num_drivers = min(max(1, config.get('num_drivers', 3)), 5)
-        capacity = min(max(4, config.get('capacity_per_driver', 8)), 12)
-        max_distance = min(max(5, config.get('max_distance_km', 15)), 20)
+        num_drivers, capacity, max_distance = read_optimize_config(config)
+        use_cache = config.get('use_cache', True)
+        warm_start = config.get('warm_start', False)
 
-        optimizer.num_drivers = num_drivers
-        optimizer.capacity_per_driver = capacity
-        optimizer.max_distance_km = max_distance
+        optimizer = build_optimizer(num_drivers, capacity, max_distance, load_road_network())
 
         points = load_points()
-        manager, routing, solution, data = optimizer.solve(points)
+
+        solution_id = optimizer.fingerprint(points)
+        cached = solution_cache.get(solution_id) if use_cache else None
+        if cached and 'points' in cached:
+            publish_solution(solution_id, cached)
+            return jsonify(dict(cached['response'], map_url=map_url(solution_id), cached=True))
+
+        diagnostic = optimizer.prescreen(points)
+        if not diagnostic['feasible']:
+            return infeasible_response(diagnostic)
+
+        previous_routes = None
+        if warm_start and route_index.drivers():
+            previous_routes = routes_from_details(route_index.routes_details())
+
+        manager, routing, solution, data = optimizer.solve(
+            points, previous_routes=previous_routes)
 
         if not solution:
             return jsonify({
@@ -100,54 +308,141 @@ def optimize_routes():
 
         routes = visualizer.extract_routes(manager, routing, solution, data)
 
-        route_df = pd.DataFrame(routes['routes_details'])
-        route_df.to_csv("routes_optimisees.csv", index=False)
-
-        os.makedirs('static', exist_ok=True)
-        map_file = "static/map.html"
-        visualizer.create_map(points, routes['routes']).save(map_file)
-
-        return jsonify({
+        response = {
             'routes': routes['routes'],
             'total_distance': routes['total_distance'],
             'total_passengers': routes['total_passengers'],
-            'map_url': '/static/map.html',
+            'map_url': map_url(solution_id),
+            'solution_id': solution_id,
             'stats': {
                 'num_drivers': num_drivers,
                 'capacity_per_driver': capacity,
                 'max_distance_km': max_distance,
-                'total_points': len(points)
+                'total_points': len(points),
+                'stop_reason': data.get('search', {}).get('stop_reason'),
+                'warm_start': data.get('search', {}).get('warm_start', False)
             }
-        })
+        }
+        cached = {
+            'response': response,
+            'routes_details': routes['routes_details'],
+            'points': points
+        }
+        solution_cache.put(solution_id, cached)
+        map_cache.invalidate(solution_id)
+        publish_solution(solution_id, cached)
+
+        return jsonify(dict(response, cached=False))
     except Exception as e:
         abort(500, description=str(e))
 
 
+@app.route('/api/jobs', methods=['POST'])
+def submit_optimization_job():
+    try:
+        config = request.json or {}
+
+        num_drivers, capacity, max_distance = read_optimize_config(config)
+        time_limit = min(max(1, config.get('time_limit', 120)), 120)
+
+        points = load_points()
+        road_network = load_road_network()
+        diagnostic = build_optimizer(num_drivers, capacity, max_distance, road_network).prescreen(points)
+        if not diagnostic['feasible']:
+            return infeasible_response(diagnostic)
+
+        job_id = jobs.submit(
+            optimization_job,
+            CHATEAU_COORDS,
+            {
+                'num_drivers': num_drivers,
+                'capacity_per_driver': capacity,
+                'max_distance_km': max_distance,
+                'time_limit': time_limit
+            },
+            points,
+            road_network=road_network,
+            matrix_cache=matrix_cache
+        )
+
+        return jsonify({
+            'job_id': job_id,
+            'status_url': f'/api/jobs/{job_id}'
+        }), 202
+    except Exception as e:
+        abort(500, description=str(e))
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_optimization_job(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        abort(404, description=f"Tâche {job_id} inconnue ou expirée")
+    return jsonify(job)
+
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_optimization_job(job_id):
+    if not jobs.cancel(job_id):
+        abort(404, description=f"Tâche {job_id} inconnue ou déjà terminée")
+    return jsonify({'job_id': job_id, 'cancelled': True})
+
+
+def map_response(solution_id):
+    """
+    Sert la carte d'une solution, rendue à la première demande
+
+    Réponse 304 si l'ETag du client est à jour ; contenu gzip si le client l'accepte.
+    Les deux encodages ont des ETags distincts, les 304 portent aussi Vary.
+    """
+    rendered = map_cache.get(solution_id)
+    if rendered is None:
+        abort(404, description=f"Solution {solution_id} inconnue")
+    etag, body = rendered
+    use_gzip = 'gzip' in request.accept_encodings
+    if use_gzip:
+        etag = f"{etag}-gzip"
+
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    elif use_gzip:
+        response = make_response(body)
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = make_response(gzip.decompress(body))
+
+    response.set_etag(etag)
+    response.headers['Content-Type'] = 'text/html; charset=utf-8'
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+@app.route('/api/map/<solution_id>', methods=['GET'])
+def get_solution_map(solution_id):
+    if not all(c in '0123456789abcdef' for c in solution_id):
+        abort(404, description=f"Solution {solution_id} inconnue")
+    return map_response(solution_id)
+
+
 @app.route('/api/map', methods=['GET'])
 def get_map():
-    try:
-        return send_file('static/map.html')
-    except FileNotFoundError:
+    if route_index.solution_id is None:
         abort(404, description="Carte non générée")
+    return map_response(route_index.solution_id)
 
 
 @app.route('/api/driver/<int:driver_id>', methods=['GET'])
 def get_driver_route(driver_id):
-    try:
-        if not os.path.exists('routes_optimisees.csv'):
-            abort(404, description="Aucun itinéraire optimisé disponible")
-
-        routes_df = pd.read_csv('routes_optimisees.csv')
-        driver_routes = routes_df[routes_df['driver_id']
-                                  == driver_id].to_dict('records')
+    if not route_index.drivers():
+        abort(404, description="Aucun itinéraire optimisé disponible")
 
-        if not driver_routes:
-            abort(
-                404, description=f"Aucun itinéraire trouvé pour le chauffeur {driver_id}")
+    driver_routes = route_index.get(driver_id)
+    if not driver_routes:
+        abort(
+            404, description=f"Aucun itinéraire trouvé pour le chauffeur {driver_id}")
 
-        return jsonify(driver_routes)
-    except Exception as e:
-        abort(500, description=str(e))
+    return jsonify(driver_routes)
 
 
 if __name__ == '__main__':
@@ -1,8 +1,14 @@
-import os
+from typing import Optional
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from osm_loader import load_osm_data
 from vrp_solver import solve_vrp, simple_route_distribution
+from plan_registry import PlanRegistry
+from jobs import vrp_job
+from job_manager import JobManager
+from routes import router
+from config import CHATEAU_COORDS, MAX_DISTANCE_KM, GEOJSON_FILE
 import logging
 import random
 
@@ -16,11 +22,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-CHATEAU_COORDS = (48.450387, -2.044774)
-MAX_DISTANCE_KM = 15
+app.include_router(router)
 
-GEOJSON_FILE = os.path.join(os.path.dirname(os.path.dirname(
-    os.path.abspath(__file__))), 'dinan_osm_data.geojson')
+plans = PlanRegistry()
+jobs = JobManager(max_workers=2, ttl_seconds=3600)
 
 
 @app.get("/optimisation")
@@ -34,36 +39,61 @@ def optimisation():
 
         try:
             data = solve_vrp(CHATEAU_COORDS, points)
+            method = "vrp"
         except Exception as e:
             logging.warning(
                 f"VRP solver failed: {e}. Using simple route distribution.")
             data = simple_route_distribution(CHATEAU_COORDS, points)
+            method = "simple"
 
-        return {"routes": data}
+        plan = plans.create(data, method=method)
 
+        return {"plan_id": plan["plan_id"], "routes": data}
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/routes/{driver_id}")
-def get_route(driver_id: int):
-    """ Récupère un trajet spécifique """
-    try:
-        points = load_osm_data(GEOJSON_FILE, CHATEAU_COORDS, MAX_DISTANCE_KM)
+def get_route(driver_id: int, plan_id: Optional[str] = None):
+    """ Récupère le trajet d'un chauffeur dans le plan courant (ou le plan demandé) """
+    plan, route = plans.get_route(driver_id, plan_id)
 
-        if not points:
-            raise HTTPException(status_code=404, detail="Aucun point trouvé.")
+    if plan is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Aucun plan disponible. Lancez d'abord /optimisation.")
 
-        data = solve_vrp(CHATEAU_COORDS, points)
+    if route is None:
+        raise HTTPException(
+            status_code=404, detail="Aucune route pour ce chauffeur.")
 
-        if driver_id >= len(data):
-            raise HTTPException(
-                status_code=404, detail="Aucune route pour ce chauffeur.")
+    return {"plan_id": plan["plan_id"], "driver_id": driver_id, "route": route}
 
-        return {"driver_id": driver_id, "route": data[driver_id]}
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+@app.get("/plans/{plan_id}")
+def get_plan(plan_id: str):
+    """ Récupère un plan complet """
+    plan = plans.get(plan_id)
+    if plan is None:
+        raise HTTPException(status_code=404, detail="Plan inconnu.")
+    return plan
+
+
+@app.delete("/plans")
+def invalidate_plans():
+    """ Invalide tous les plans """
+    return {"invalidated": plans.invalidate()}
+
+
+@app.delete("/plans/{plan_id}")
+def invalidate_plan(plan_id: str):
+    """ Invalide un plan """
+    if not plans.invalidate(plan_id):
+        raise HTTPException(status_code=404, detail="Plan inconnu.")
+    return {"invalidated": 1}
 
 
 @app.post("/optimize_route")
@@ -92,6 +122,56 @@ async def optimize_custom_route(request: Request):
 
     return {"routes": routes}
 
+@app.post("/jobs")
+async def submit_route_job(request: Request):
+    """ Soumet une optimisation en tâche de fond et retourne son identifiant """
+    data = await request.json()
+    start_point = data.get('start_point')
+    delivery_points = data.get('delivery_points')
+    time_limit = min(max(1, data.get('time_limit', 30)), 120)
+
+    points = [
+        {
+            'lat': point['latitude'],
+            'lon': point['longitude'],
+            'passengers': random.randint(1, 3),
+            'name': 'Delivery Point'
+        }
+        for point in delivery_points
+    ]
+
+    job_id = jobs.submit(
+        vrp_job,
+        (start_point['latitude'], start_point['longitude']),
+        points,
+        max_points=30,
+        time_limit=time_limit
+    )
+
+    return JSONResponse(
+        status_code=202,
+        content={"job_id": job_id, "status_url": f"/jobs/{job_id}"})
+
+
+@app.get("/jobs/{job_id}")
+def get_route_job(job_id: str):
+    """ Récupère l'état, la progression et la meilleure solution d'une tâche """
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404, detail="Tâche inconnue ou expirée.")
+    return job
+
+
+@app.delete("/jobs/{job_id}")
+def cancel_route_job(job_id: str):
+    """ Annule une tâche en attente ou en cours """
+    if not jobs.cancel(job_id):
+        raise HTTPException(
+            status_code=404, detail="Tâche inconnue ou déjà terminée.")
+    return {"job_id": job_id, "cancelled": True}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
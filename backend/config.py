@@ -0,0 +1,10 @@
+"""
+Paramètres du problème communs à l'application et aux routes de l'API
+"""
+import os
+
+CHATEAU_COORDS = (48.450387, -2.044774)
+MAX_DISTANCE_KM = 15
+
+GEOJSON_FILE = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'dinan_osm_data.geojson')
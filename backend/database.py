@@ -0,0 +1,177 @@
+"""
+Configuration des moteurs SQLAlchemy : pool de connexions, délais et métriques
+"""
+import os
+import threading
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class DatabaseSettings:
+    """
+    Paramètres du pool de connexions, lus dans l'environnement par from_env()
+
+    DB_POOL_SIZE, DB_MAX_OVERFLOW : connexions permanentes et supplémentaires
+    DB_POOL_TIMEOUT : attente maximale d'une connexion libre (secondes)
+    DB_POOL_RECYCLE : durée de vie maximale d'une connexion (secondes)
+    DB_POOL_PRE_PING : vérifie la connexion avant chaque emprunt
+    DB_STATEMENT_TIMEOUT_MS : durée maximale d'une requête (PostgreSQL, 0 = aucune)
+    ASYNC_DATABASE_URL : URL du moteur asynchrone (ex. postgresql+asyncpg://...)
+    """
+
+    def __init__(self, url, pool_size=5, max_overflow=10, pool_timeout=30,
+                 pool_recycle=1800, pool_pre_ping=True, statement_timeout_ms=30000,
+                 async_url=None):
+        self.url = url
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_timeout = pool_timeout
+        self.pool_recycle = pool_recycle
+        self.pool_pre_ping = pool_pre_ping
+        self.statement_timeout_ms = statement_timeout_ms
+        self.async_url = async_url
+
+    @classmethod
+    def from_env(cls, default_url):
+        return cls(
+            url=os.environ.get("DATABASE_URL", default_url),
+            pool_size=_env_int("DB_POOL_SIZE", 5),
+            max_overflow=_env_int("DB_MAX_OVERFLOW", 10),
+            pool_timeout=_env_int("DB_POOL_TIMEOUT", 30),
+            pool_recycle=_env_int("DB_POOL_RECYCLE", 1800),
+            pool_pre_ping=_env_bool("DB_POOL_PRE_PING", True),
+            statement_timeout_ms=_env_int("DB_STATEMENT_TIMEOUT_MS", 30000),
+            async_url=os.environ.get("ASYNC_DATABASE_URL") or None
+        )
+
+    def engine_kwargs(self, url):
+        """Arguments de create_engine adaptés au dialecte de l'URL"""
+        url = make_url(url)
+        kwargs = {"pool_pre_ping": self.pool_pre_ping}
+        if url.get_backend_name() == "sqlite":
+            # SQLite : pas de serveur, le pool par défaut du dialecte est conservé
+            kwargs["connect_args"] = {"check_same_thread": False}
+            return kwargs
+
+        kwargs.update(
+            pool_size=self.pool_size,
+            max_overflow=self.max_overflow,
+            pool_timeout=self.pool_timeout,
+            pool_recycle=self.pool_recycle
+        )
+        if url.get_backend_name() == "postgresql" and self.statement_timeout_ms:
+            if url.get_driver_name() == "asyncpg":
+                kwargs["connect_args"] = {
+                    "server_settings": {"statement_timeout": str(self.statement_timeout_ms)}}
+            else:
+                kwargs["connect_args"] = {
+                    "options": f"-c statement_timeout={self.statement_timeout_ms}"}
+        return kwargs
+
+
+class PoolMetrics:
+    """
+    Compteurs d'un pool : connexions empruntées, ouvertes, invalidées et
+    temps d'attente pour obtenir une connexion (mesuré par timed_acquire).
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.invalidations = 0
+        self.acquisitions = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.peak_checked_out = 0
+
+        pool = engine.pool
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        checked_out = self._checked_out()
+        with self._lock:
+            self.checkouts += 1
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def _checked_out(self):
+        checkedout = getattr(self.engine.pool, "checkedout", None)
+        return checkedout() if checkedout else None
+
+    def timed_acquire(self, session):
+        """Emprunte la connexion de la session en mesurant l'attente"""
+        start = time.monotonic()
+        session.connection()
+        self._record_wait(time.monotonic() - start)
+
+    async def timed_acquire_async(self, session):
+        """Emprunte la connexion d'une session asynchrone en mesurant l'attente"""
+        start = time.monotonic()
+        await session.connection()
+        self._record_wait(time.monotonic() - start)
+
+    def _record_wait(self, wait):
+        with self._lock:
+            self.acquisitions += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def stats(self):
+        """Retourne l'état du pool et les compteurs"""
+        pool = self.engine.pool
+        with self._lock:
+            stats = {
+                "pool": pool.__class__.__name__,
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "invalidations": self.invalidations,
+                "peak_checked_out": self.peak_checked_out,
+                "acquisitions": self.acquisitions,
+                "wait_avg_ms": 1000 * self.total_wait / self.acquisitions if self.acquisitions else 0.0,
+                "wait_max_ms": 1000 * self.max_wait
+            }
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            method = getattr(pool, name, None)
+            if method is not None:
+                stats[name] = method()
+        return stats
+
+
+def create_db_engine(settings):
+    """Crée le moteur synchrone et ses métriques de pool"""
+    engine = create_engine(settings.url, **settings.engine_kwargs(settings.url))
+    return engine, PoolMetrics(engine)
+
+
+def create_async_db_engine(settings):
+    """Crée le moteur asynchrone si ASYNC_DATABASE_URL est renseignée (None sinon)"""
+    if not settings.async_url:
+        return None, None
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    engine = create_async_engine(settings.async_url, **settings.engine_kwargs(settings.async_url))
+    return engine, PoolMetrics(engine.sync_engine)
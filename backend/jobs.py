@@ -0,0 +1,41 @@
+"""
+Tâches d'optimisation asynchrones exécutées dans un pool de processus borné
+"""
+import time
+from vrp_solver import solve_vrp
+
+
+def vrp_job(context, start_coords, points, max_points=30, time_limit=30):
+    """
+    Tâche de résolution VRP exécutée dans un processus du pool
+
+    Args:
+        context: JobContext de la tâche
+        start_coords: Coordonnées (lat, lon) du point de départ
+        points: Points à desservir
+        max_points: Nombre maximum de points retenus
+        time_limit: Durée maximale de la recherche en secondes
+
+    Returns:
+        list: Routes par chauffeur
+    """
+    start_time = time.time()
+    search = {'improvements': 0}
+
+    def on_solution(routes, cost):
+        search['improvements'] += 1
+        context.publish_best(routes)
+        context.report(
+            improvements=search['improvements'],
+            best_cost=cost,
+            elapsed=time.time() - start_time
+        )
+
+    return solve_vrp(
+        start_coords,
+        points,
+        max_points=max_points,
+        time_limit=time_limit,
+        on_solution=on_solution,
+        should_stop=context.cancelled
+    )
@@ -1,7 +1,8 @@
-import json
+import ijson
 import random
 from math import radians, cos, sin, asin, sqrt
-from utils import generate_random_time
+import shared  # racine du dépôt dans sys.path (modules communs)
+from time_windows import generate_service_time
 import logging
 
 
@@ -18,15 +19,22 @@ def haversine(lon1, lat1, lon2, lat2):
     return c * r
 
 
+def iter_osm_features(geojson_file):
+    """
+    Parcourt les features du fichier GeoJSON une par une avec un parseur incrémental,
+    sans charger le fichier entier en mémoire.
+    """
+    with open(geojson_file, 'rb') as f:
+        for feature in ijson.items(f, 'features.item', use_float=True):
+            yield feature
+
+
 def load_osm_data(geojson_file, chateau_coords, max_distance_km, max_points=100):
     """
     Charge les données OSM et filtre les points dans le rayon maximum.
     """
-    with open(geojson_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
     points = []
-    for feature in data['features']:
+    for feature in iter_osm_features(geojson_file):
         coords = None
         name = feature.get('properties', {}).get('name', 'Unnamed Location')
 
@@ -49,8 +57,9 @@ def load_osm_data(geojson_file, chateau_coords, max_distance_km, max_points=100)
                     'passengers': passengers,
                     'distance_to_chateau': distance,
                     'name': name,
-                    'arrival_time': generate_random_time('08:00', '16:00')
+                    'arrival_time': generate_service_time()
                 })
+                if len(points) >= max_points:
+                    break
     logging.info(len(points))
-    points = points[:max_points]
     return points
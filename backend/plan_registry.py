@@ -0,0 +1,86 @@
+"""
+Registre en mémoire des plans de tournées calculés
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class PlanRegistry:
+    """
+    Conserve les derniers plans calculés, indexés par identifiant.
+
+    Un plan est une liste de routes (une par chauffeur). Le dernier plan créé
+    est le plan courant, utilisé quand aucun identifiant n'est précisé.
+    """
+
+    def __init__(self, max_plans=16):
+        self.max_plans = max_plans
+        self._lock = threading.Lock()
+        self._plans = OrderedDict()
+        self._current_id = None
+
+    def create(self, routes, **metadata):
+        """
+        Enregistre un nouveau plan et en fait le plan courant
+
+        Args:
+            routes: Liste des routes, indexée par identifiant de chauffeur
+            metadata: Informations complémentaires stockées avec le plan
+
+        Returns:
+            dict: Le plan enregistré
+        """
+        plan = {
+            'plan_id': uuid.uuid4().hex,
+            'created_at': time.time(),
+            'routes': routes,
+            **metadata
+        }
+        with self._lock:
+            self._plans[plan['plan_id']] = plan
+            self._current_id = plan['plan_id']
+            while len(self._plans) > self.max_plans:
+                self._plans.popitem(last=False)
+        return plan
+
+    def get(self, plan_id=None):
+        """Retourne le plan demandé (ou le plan courant), ou None"""
+        with self._lock:
+            return self._plans.get(plan_id or self._current_id)
+
+    def get_route(self, driver_id, plan_id=None):
+        """
+        Retourne la route d'un chauffeur dans un plan
+
+        Returns:
+            tuple: (plan, route) ; plan vaut None si le plan n'existe pas,
+            route vaut None si le chauffeur n'a pas de route
+        """
+        plan = self.get(plan_id)
+        if plan is None:
+            return None, None
+        if not 0 <= driver_id < len(plan['routes']):
+            return plan, None
+        return plan, plan['routes'][driver_id]
+
+    def invalidate(self, plan_id=None):
+        """
+        Supprime un plan, ou tous les plans si plan_id est None
+
+        Returns:
+            int: Nombre de plans supprimés
+        """
+        with self._lock:
+            if plan_id is None:
+                count = len(self._plans)
+                self._plans.clear()
+                self._current_id = None
+                return count
+
+            if self._plans.pop(plan_id, None) is None:
+                return 0
+            if self._current_id == plan_id:
+                self._current_id = next(reversed(self._plans), None)
+            return 1
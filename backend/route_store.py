@@ -0,0 +1,111 @@
+"""
+Écriture groupée des plans de tournées en base
+"""
+import time
+import uuid
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from models import Plan, Route
+
+
+def route_rows(plan_id, routes):
+    """
+    Convertit les routes (une liste d'arrêts par chauffeur) en lignes de la table routes
+    """
+    return [
+        {
+            "plan_id": plan_id,
+            "driver_id": driver_id,
+            "stop_number": stop_number,
+            "lat": stop["lat"],
+            "lon": stop["lon"],
+            "passengers": stop.get("passengers"),
+            "name": stop.get("name"),
+            "arrival_time": stop.get("arrival_time"),
+        }
+        for driver_id, route in enumerate(routes)
+        for stop_number, stop in enumerate(route, start=1)
+    ]
+
+
+def save_plan(db, routes, keep_plans=1, max_attempts=5):
+    """
+    Enregistre un plan en une seule transaction et en fait le plan courant
+
+    Les arrêts sont insérés par un unique INSERT exécuté en lot (executemany),
+    sans objet ORM par ligne. Les plans au-delà des keep_plans plus récents et
+    leurs arrêts sont supprimés dans la même transaction : les lecteurs voient
+    l'ancien plan ou le nouveau, jamais un mélange.
+
+    La version est unique en base : si un enregistrement concurrent a pris la
+    même version, la transaction est annulée et rejouée avec la suivante
+    (max_attempts tentatives au plus).
+
+    Returns:
+        dict: plan_id, version et nombre d'arrêts du plan enregistré
+    """
+    plan_id = uuid.uuid4().hex
+    rows = route_rows(plan_id, routes)
+
+    for attempt in range(max_attempts):
+        try:
+            version = (db.execute(select(func.max(Plan.version))).scalar() or 0) + 1
+            db.execute(insert(Plan).values(
+                plan_id=plan_id, version=version, created_at=time.time(), num_stops=len(rows)))
+            if rows:
+                db.execute(insert(Route), rows)
+
+            stale = select(Plan.plan_id).where(Plan.version <= version - keep_plans)
+            db.execute(delete(Route).where(Route.plan_id.in_(stale) | Route.plan_id.is_(None)))
+            db.execute(delete(Plan).where(Plan.version <= version - keep_plans))
+            db.commit()
+            break
+        except IntegrityError:
+            db.rollback()
+            if attempt == max_attempts - 1:
+                raise
+        except Exception:
+            db.rollback()
+            raise
+
+    return {"plan_id": plan_id, "version": version, "num_stops": len(rows)}
+
+
+def current_plan_query():
+    """ Requête du plan courant (version, date, nombre d'arrêts), pour une session synchrone ou asynchrone """
+    return select(Plan.plan_id, Plan.version, Plan.created_at, Plan.num_stops) \
+        .order_by(Plan.version.desc()).limit(1)
+
+
+def current_plan_id(db):
+    """ Identifiant du plan courant, ou None """
+    return db.execute(
+        select(Plan.plan_id).order_by(Plan.version.desc()).limit(1)).scalar()
+
+
+ROUTE_FIELDS = ("driver_id", "stop_number", "lat", "lon", "passengers", "name", "arrival_time")
+KEY_FIELDS = ("driver_id", "stop_number")
+
+
+def read_routes(db, plan_id, fields=ROUTE_FIELDS, driver_id=None, after=None, limit=500):
+    """
+    Lit une page d'arrêts d'un plan, triés par (driver_id, stop_number)
+
+    Pagination par clé : after est le couple (driver_id, stop_number) du dernier
+    arrêt de la page précédente. Seules les colonnes demandées sont lues en base ;
+    la clé de tri est toujours incluse.
+
+    Returns:
+        list: Arrêts sous forme de dictionnaires {champ: valeur}
+    """
+    names = list(KEY_FIELDS) + [field for field in fields if field not in KEY_FIELDS]
+    query = select(*[getattr(Route, name) for name in names]).where(Route.plan_id == plan_id)
+    if driver_id is not None:
+        query = query.where(Route.driver_id == driver_id)
+    if after is not None:
+        after_driver, after_stop = after
+        query = query.where(
+            (Route.driver_id > after_driver) |
+            ((Route.driver_id == after_driver) & (Route.stop_number > after_stop)))
+    query = query.order_by(Route.driver_id, Route.stop_number).limit(limit)
+    return [dict(zip(names, row)) for row in db.execute(query)]
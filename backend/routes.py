@@ -1,29 +1,162 @@
-from fastapi import APIRouter, Depends
+import json
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.orm import Session
-from models import Route, SessionLocal
+from config import CHATEAU_COORDS, GEOJSON_FILE, MAX_DISTANCE_KM
+from models import SessionLocal, AsyncSessionLocal, pool_metrics, async_pool_metrics
+from osm_loader import load_osm_data
+from route_store import ROUTE_FIELDS, current_plan_id, current_plan_query, read_routes, save_plan
 from vrp_solver import solve_vrp
 
 router = APIRouter()
 
+MAX_PAGE_SIZE = 5000
+STREAM_BATCH_SIZE = 1000
 
-def get_db():
+
+def open_db():
+    """ Ouvre une session dont la connexion est empruntée au pool (attente mesurée) """
     db = SessionLocal()
+    try:
+        pool_metrics.timed_acquire(db)
+    except Exception:
+        db.close()
+        raise
+    return db
+
+
+def get_db():
+    """ Session par requête : connexion empruntée au pool (attente mesurée), annulée en cas d'erreur """
+    db = open_db()
     try:
         yield db
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    """ Session asynchrone par requête (nécessite ASYNC_DATABASE_URL) """
+    if AsyncSessionLocal is None:
+        raise HTTPException(status_code=503, detail="Moteur asynchrone non configuré.")
+    async with AsyncSessionLocal() as db:
+        try:
+            await async_pool_metrics.timed_acquire_async(db)
+            yield db
+        except Exception:
+            await db.rollback()
+            raise
+
+
+@router.get("/db/pool")
+def get_pool_metrics():
+    """ Métriques des pools de connexions """
+    return {
+        "sync": pool_metrics.stats(),
+        "async": async_pool_metrics.stats() if async_pool_metrics is not None else None
+    }
+
+
+@router.get("/saved_plans/current")
+async def get_current_saved_plan(db=Depends(get_async_db)):
+    """ Plan enregistré courant, lu par le moteur asynchrone sans occuper de thread """
+    row = (await db.execute(current_plan_query())).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Aucun plan enregistré.")
+    return dict(row._mapping)
+
+
+def parse_fields(fields):
+    """ Valide la liste de colonnes demandées (séparées par des virgules) """
+    if not fields:
+        return ROUTE_FIELDS
+    requested = tuple(field.strip() for field in fields.split(",") if field.strip())
+    unknown = [field for field in requested if field not in ROUTE_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Champs inconnus : {', '.join(unknown)} (disponibles : {', '.join(ROUTE_FIELDS)})")
+    return requested
+
+
+def parse_cursor(after):
+    """ Lit un curseur de pagination driver_id:stop_number """
+    if after is None:
+        return None
+    try:
+        driver_id, stop_number = map(int, after.split(":"))
+    except ValueError:
+        raise HTTPException(
+            status_code=400, detail="Curseur attendu : driver_id:stop_number")
+    return driver_id, stop_number
+
+
+def stream_routes(db, plan_id, fields, driver_id, after):
+    """ Produit les arrêts en NDJSON, lus par lots ; ferme la session à la fin du flux """
+    try:
+        while True:
+            rows = read_routes(db, plan_id, fields, driver_id, after, STREAM_BATCH_SIZE)
+            for row in rows:
+                yield json.dumps(row, ensure_ascii=False) + "\n"
+            if len(rows) < STREAM_BATCH_SIZE:
+                break
+            after = (rows[-1]["driver_id"], rows[-1]["stop_number"])
     finally:
         db.close()
 
 
 @router.get("/routes")
-def get_routes(db: Session = Depends(get_db)):
-    return db.query(Route).all()
+def get_routes(plan_id: Optional[str] = None, driver_id: Optional[int] = None,
+               fields: Optional[str] = None, after: Optional[str] = None,
+               limit: int = 500, format: str = "json"):
+    """
+    Arrêts d'un plan (le plan courant par défaut), triés par chauffeur puis par ordre de passage
+
+    Pagination par clé : next_after est à repasser dans after pour la page suivante.
+    format=ndjson renvoie en flux tous les arrêts restants, une ligne JSON par arrêt.
+    Une seule connexion par requête : en flux, la session est cédée à la réponse
+    et fermée à la fin de l'envoi.
+    """
+    columns = parse_fields(fields)
+    cursor = parse_cursor(after)
+    if format not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail="Format attendu : json ou ndjson")
+
+    db = open_db()
+    streaming = False
+    try:
+        if plan_id is None:
+            plan_id = current_plan_id(db)
+            if plan_id is None:
+                raise HTTPException(status_code=404, detail="Aucun plan enregistré.")
+
+        if format == "ndjson":
+            response = StreamingResponse(
+                stream_routes(db, plan_id, columns, driver_id, cursor),
+                media_type="application/x-ndjson",
+                headers={"X-Plan-Id": plan_id},
+                background=BackgroundTask(db.close))
+            streaming = True
+            return response
+
+        limit = min(max(1, limit), MAX_PAGE_SIZE)
+        rows = read_routes(db, plan_id, columns, driver_id, cursor, limit)
+        next_after = None
+        if len(rows) == limit:
+            next_after = f"{rows[-1]['driver_id']}:{rows[-1]['stop_number']}"
+        return {"plan_id": plan_id, "routes": rows, "next_after": next_after}
+    finally:
+        if not streaming:
+            db.close()
 
 
 @router.post("/generate_routes")
 def generate_routes(db: Session = Depends(get_db)):
-    data = solve_vrp()
-    for route in data:
-        db_route = Route(**route)
-        db.add(db_route)
-    db.commit()
-    return {"message": "Routes generated"}
+    points = load_osm_data(GEOJSON_FILE, CHATEAU_COORDS, MAX_DISTANCE_KM)
+    data = solve_vrp(CHATEAU_COORDS, points)
+    plan = save_plan(db, data)
+    return {"message": "Routes generated", **plan}
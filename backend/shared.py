@@ -0,0 +1,14 @@
+"""
+Accès aux modules partagés avec l'API Flask, situés à la racine du dépôt
+
+Le backend est lancé depuis backend/ avec des imports à plat. Importer ce module
+ajoute la racine du dépôt en fin de sys.path : les modules du backend restent
+prioritaires et les modules communs (convergence, distance_matrix, time_windows,
+job_manager) ne sont pas dupliqués.
+"""
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
@@ -5,6 +5,8 @@ import math
 import random
 import json
 import os
+import shared  # racine du dépôt dans sys.path (modules communs)
+from time_windows import parse_time
 
 
 def haversine(lon1, lat1, lon2, lat2):
@@ -45,20 +47,6 @@ def format_time(minutes):
     return f"{int(hours):02d}:{int(mins):02d}"
 
 
-def parse_time(time_str):
-    """
-    Convertit une heure au format HH:MM en minutes depuis minuit
-
-    Args:
-        time_str: Heure au format HH:MM
-
-    Returns:
-        int: Minutes depuis minuit
-    """
-    hours, minutes = map(int, time_str.split(':'))
-    return hours * 60 + minutes
-
-
 def generate_random_time(start_time, end_time):
     """
     Génère une heure aléatoire entre deux heures
@@ -3,15 +3,53 @@ import numpy as np
 import logging
 import time
 import random
-from osm_loader import haversine
-from utils import generate_random_time
+import shared  # racine du dépôt dans sys.path (modules communs)
+from distance_matrix import haversine_matrix
+from convergence import ConvergencePolicy
+from job_manager import CurrentAssignment
+from time_windows import (generate_service_time, point_windows, travel_minutes,
+                          unreachable_nodes, add_time_dimension,
+                          WINDOW_WIDTH, WINDOW_PENALTY, SERVICE_MINUTES, AVERAGE_SPEED_KMH)
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
 
-def solve_vrp(chateau_coords, points, max_points=8):
+def extract_routes(manager, routing, solution, points, num_vehicles):
+    """
+    Extrait la liste des arrêts de chaque chauffeur depuis une solution
+    """
+    routes = []
+    for vehicle_id in range(num_vehicles):
+        route = []
+        index = routing.Start(vehicle_id)
+        while not routing.IsEnd(index):
+            node_index = manager.IndexToNode(index)
+            if node_index != 0:
+                point = points[node_index - 1]
+                route.append({
+                    "lat": point["lat"],
+                    "lon": point["lon"],
+                    "name": point.get("name", "Point"),
+                    "arrival_time": point.get("arrival_time", ""),
+                    "passengers": point.get("passengers", 1)
+                })
+            index = solution.Value(routing.NextVar(index))
+        routes.append(route)
+    return routes
+
+
+def solve_vrp(chateau_coords, points, max_points=8, time_limit=30,
+              on_solution=None, should_stop=None):
     """
     Résout le problème du VRP avec une approche simplifiée
+
+    on_solution(routes, cost) est appelé à chaque amélioration de la solution ;
+    should_stop() est interrogé pendant la recherche et l'interrompt s'il retourne True.
+
+    Chaque point doit être desservi entre son heure d'arrivée et la fin de son
+    créneau (8h-12h ou 14h-16h) ; le dépassement de WINDOW_WIDTH minutes est
+    pénalisé. Lève ValueError avant toute recherche si un point est hors créneau
+    ou inatteignable depuis le dépôt.
     """
     start_time = time.time()
 
@@ -19,59 +57,63 @@ def solve_vrp(chateau_coords, points, max_points=8):
     logging.info(f"Résolution VRP avec {len(points)} points")
 
     for point in points:
-        point['arrival_time'] = point.get(
-            'arrival_time', generate_random_time('08:00', '16:00'))
+        point['arrival_time'] = point.get('arrival_time', generate_service_time())
         point['name'] = point.get('name', 'Unnamed Location')
 
     locations = [chateau_coords] + [(p['lat'], p['lon']) for p in points]
-    num_locations = len(locations)
-
-    distance_matrix = np.zeros((num_locations, num_locations))
-    for i in range(num_locations):
-        for j in range(num_locations):
-            if i != j:
-                distance_matrix[i][j] = haversine(
-                    locations[i][1], locations[i][0],
-                    locations[j][1], locations[j][0]
-                ) * 1000
+    distance_matrix = haversine_matrix(locations)
+    time_matrix = travel_minutes(distance_matrix, AVERAGE_SPEED_KMH)
 
     num_vehicles = 3
     vehicle_capacity = 8
     vehicle_capacities = [vehicle_capacity] * num_vehicles
 
     demands = [0] + [p.get('passengers', 1) for p in points]
+    service_times = [0] + [SERVICE_MINUTES] * len(points)
 
-    time_windows = [(0, 600)]
-    for p in points:
-        arrival_time = p.get('arrival_time', '08:00')
-        hours, minutes = map(int, arrival_time.split(':'))
-        min_time = hours * 60 + minutes
-        time_windows.append((min_time, min_time + 120))
+    time_windows, service_windows, outside = point_windows(points, WINDOW_WIDTH)
+    if outside:
+        raise ValueError(
+            f"{len(outside)} point(s) hors des créneaux 8h-12h / 14h-16h")
+    unreachable = unreachable_nodes(time_matrix, service_windows, service_times)
+    if len(unreachable):
+        raise ValueError(
+            f"{len(unreachable)} point(s) inatteignable(s) dans leur créneau")
 
     try:
         manager = pywrapcp.RoutingIndexManager(
             len(distance_matrix), num_vehicles, 0)
         routing = pywrapcp.RoutingModel(manager)
 
-        def distance_callback(from_index, to_index):
-            from_node = manager.IndexToNode(from_index)
-            to_node = manager.IndexToNode(to_index)
-            return int(distance_matrix[from_node][to_node])
-
-        transit_callback_index = routing.RegisterTransitCallback(
-            distance_callback)
+        transit_callback_index = routing.RegisterTransitMatrix(
+            distance_matrix.tolist())
         routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
 
-        def demand_callback(from_index):
-            from_node = manager.IndexToNode(from_index)
-            return demands[from_node]
-
-        demand_callback_index = routing.RegisterUnaryTransitCallback(
-            demand_callback)
+        demand_callback_index = routing.RegisterUnaryTransitVector(
+            [int(demand) for demand in demands])
         routing.AddDimensionWithVehicleCapacity(
             demand_callback_index, 0, vehicle_capacities, True, "Capacity"
         )
 
+        time_callback_index = routing.RegisterTransitMatrix(
+            (time_matrix + np.asarray(service_times)[:, None]).tolist())
+        add_time_dimension(routing, manager, time_callback_index,
+                           time_windows, service_windows, WINDOW_PENALTY)
+
+        if on_solution:
+            best_cost = [None]
+
+            def solution_callback():
+                cost = routing.CostVar().Value()
+                if best_cost[0] is None or cost < best_cost[0]:
+                    best_cost[0] = cost
+                    on_solution(extract_routes(
+                        manager, routing, CurrentAssignment(), points, num_vehicles), cost)
+
+            routing.AddAtSolutionCallback(solution_callback)
+        monitor = ConvergencePolicy().monitor(time_limit, should_stop)
+        monitor.attach(routing)
+
         search_parameters = pywrapcp.DefaultRoutingSearchParameters()
         search_parameters.first_solution_strategy = (
             routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
@@ -79,9 +121,10 @@ def solve_vrp(chateau_coords, points, max_points=8):
         search_parameters.local_search_metaheuristic = (
             routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
         )
-        search_parameters.time_limit.seconds = 30
+        search_parameters.time_limit.seconds = time_limit
 
         solution = routing.SolveWithParameters(search_parameters)
+        logging.info(f"Recherche arrêtée : {monitor.finish()['stop_reason']}")
 
         if not solution:
             logging.warning(
@@ -91,22 +134,7 @@ def solve_vrp(chateau_coords, points, max_points=8):
                 for i in range(0, len(points), len(points)//num_vehicles)
             ]
 
-        routes = []
-        for vehicle_id in range(num_vehicles):
-            route = []
-            index = routing.Start(vehicle_id)
-            while not routing.IsEnd(index):
-                node_index = manager.IndexToNode(index)
-                if node_index != 0:
-                    point = points[node_index - 1]
-                    route.append({
-                        "lat": point["lat"],
-                        "lon": point["lon"],
-                        "name": point.get("name", "Point"),
-                        "arrival_time": point.get("arrival_time", "")
-                    })
-                index = solution.Value(routing.NextVar(index))
-            routes.append(route)
+        routes = extract_routes(manager, routing, solution, points, num_vehicles)
 
         end_time = time.time()
         logging.info(
@@ -0,0 +1,102 @@
+"""
+Banc d'essai du débit de la recherche locale OR-Tools :
+transits évalués par des callbacks Python contre transits enregistrés en matrices
+"""
+import argparse
+import math
+import random
+import time
+from ortools.constraint_solver import routing_enums_pb2
+from ortools.constraint_solver import pywrapcp
+from distance_matrix import haversine_matrix
+
+CHATEAU_COORDS = (48.45038746219548, -2.0447748346342434)
+
+
+def random_locations(center, num_points, radius_km, seed=0):
+    """Génère des coordonnées aléatoires dans un disque autour du centre"""
+    rng = random.Random(seed)
+    locations = [center]
+    for _ in range(num_points):
+        r = radius_km * math.sqrt(rng.random())
+        theta = rng.uniform(0, 2 * math.pi)
+        lat = center[0] + r * math.cos(theta) / 111.195
+        lon = center[1] + r * math.sin(theta) / (111.195 * math.cos(math.radians(center[0])))
+        locations.append((lat, lon))
+    return locations
+
+
+def build_model(distance_matrix, demands, num_vehicles, capacity, use_matrix):
+    """Construit un modèle distance + capacité, avec des transits Python ou matriciels"""
+    manager = pywrapcp.RoutingIndexManager(len(distance_matrix), num_vehicles, 0)
+    routing = pywrapcp.RoutingModel(manager)
+
+    if use_matrix:
+        transit_index = routing.RegisterTransitMatrix(distance_matrix.tolist())
+        demand_index = routing.RegisterUnaryTransitVector(demands)
+    else:
+        def distance_callback(from_index, to_index):
+            from_node = manager.IndexToNode(from_index)
+            to_node = manager.IndexToNode(to_index)
+            return int(distance_matrix[from_node][to_node])
+
+        def demand_callback(from_index):
+            from_node = manager.IndexToNode(from_index)
+            return demands[from_node]
+
+        transit_index = routing.RegisterTransitCallback(distance_callback)
+        demand_index = routing.RegisterUnaryTransitCallback(demand_callback)
+
+    routing.SetArcCostEvaluatorOfAllVehicles(transit_index)
+    routing.AddDimensionWithVehicleCapacity(
+        demand_index, 0, [capacity] * num_vehicles, True, 'Capacity')
+    return routing
+
+
+def measure(routing, seconds):
+    """Lance une recherche GLS de durée fixe et compte les solutions trouvées"""
+    solutions = [0]
+    routing.AddAtSolutionCallback(lambda: solutions.__setitem__(0, solutions[0] + 1))
+
+    search_parameters = pywrapcp.DefaultRoutingSearchParameters()
+    search_parameters.first_solution_strategy = (
+        routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
+    )
+    search_parameters.local_search_metaheuristic = (
+        routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+    )
+    search_parameters.time_limit.seconds = seconds
+
+    start_time = time.time()
+    solution = routing.SolveWithParameters(search_parameters)
+    elapsed = time.time() - start_time
+    return {
+        'solutions': solutions[0],
+        'solutions_per_second': solutions[0] / elapsed,
+        'cost': solution.ObjectiveValue() if solution else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Banc d\'essai des callbacks de transit')
+    parser.add_argument('--points', type=int, default=100, help='Nombre de points de ramassage')
+    parser.add_argument('--seconds', type=int, default=10, help='Durée de chaque recherche')
+    parser.add_argument('--drivers', type=int, default=10, help='Nombre de chauffeurs')
+    parser.add_argument('--seed', type=int, default=0, help='Graine aléatoire')
+    args = parser.parse_args()
+
+    locations = random_locations(CHATEAU_COORDS, args.points, 15, args.seed)
+    distance_matrix = haversine_matrix(locations)
+    rng = random.Random(args.seed)
+    demands = [0] + [rng.randint(1, 3) for _ in range(args.points)]
+    capacity = -(-sum(demands) // args.drivers) + 3
+
+    for label, use_matrix in [('callbacks Python', False), ('matrices', True)]:
+        routing = build_model(distance_matrix, demands, args.drivers, capacity, use_matrix)
+        result = measure(routing, args.seconds)
+        print(f"{label:>16}: {result['solutions']} solutions, "
+              f"{result['solutions_per_second']:.1f} solutions/s, coût {result['cost']}")
+
+
+if __name__ == "__main__":
+    main()
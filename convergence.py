@@ -0,0 +1,118 @@
+"""
+Arrêt anticipé de la recherche OR-Tools lorsque l'objectif ne progresse plus
+"""
+import time
+
+
+class ConvergencePolicy:
+    """
+    Critères d'arrêt sur plateau de l'objectif.
+
+    La recherche s'arrête quand le meilleur coût ne s'est pas amélioré de plus
+    de min_improvement (fraction, 0.005 = 0,5 %) depuis window_solutions solutions,
+    ou depuis une durée au moins égale à window_seconds et à stall_ratio fois le
+    temps écoulé jusqu'à la dernière amélioration : les petits problèmes, qui
+    convergent tout de suite, s'arrêtent vite, les gros disposent d'un délai
+    proportionnel. Un critère à None est désactivé.
+    """
+
+    def __init__(self, min_improvement=0.005, window_seconds=0.25, stall_ratio=1.0,
+                 window_solutions=1000):
+        self.min_improvement = min_improvement
+        self.window_seconds = window_seconds
+        self.stall_ratio = stall_ratio
+        self.window_solutions = window_solutions
+
+    def scaled(self, time_limit, fraction=0.2):
+        """
+        Retourne une copie dont la fenêtre de plateau vaut au moins fraction du budget
+
+        Pour les recherches amorcées par une solution existante : la première
+        solution est déjà bonne et l'amélioration suivante demande plus de temps
+        que la fenêtre par défaut.
+        """
+        window_seconds = self.window_seconds
+        if window_seconds is not None:
+            window_seconds = max(window_seconds, fraction * time_limit)
+        return ConvergencePolicy(self.min_improvement, window_seconds, self.stall_ratio,
+                                 self.window_solutions)
+
+    def monitor(self, time_limit, should_stop=None):
+        """Crée un moniteur de convergence pour une recherche"""
+        return ConvergenceMonitor(self, time_limit, should_stop)
+
+
+class ConvergenceMonitor:
+    """
+    Suit l'évolution de l'objectif pendant une recherche et décide de son arrêt.
+
+    stop_reason vaut 'plateau_time', 'plateau_solutions' ou 'cancelled' quand le
+    moniteur interrompt la recherche, puis 'time_limit' ou 'completed' après finish().
+    """
+
+    def __init__(self, policy, time_limit, should_stop=None):
+        self.policy = policy
+        self.time_limit = time_limit
+        self.external_stop = should_stop
+        self.start_time = time.monotonic()
+        self.solutions = 0
+        self.best_cost = None
+        self.reference_cost = None
+        self.last_improvement_time = self.start_time
+        self.solutions_since_improvement = 0
+        self.stop_reason = None
+
+    def attach(self, routing):
+        """Branche le moniteur sur un modèle (callback de solution et limite personnalisée)"""
+        routing.AddAtSolutionCallback(
+            lambda: self.on_solution(routing.CostVar().Value()))
+        routing.AddSearchMonitor(routing.solver().CustomLimit(self.should_stop))
+
+    def on_solution(self, cost):
+        """Enregistre une solution trouvée par la recherche"""
+        self.solutions += 1
+        if self.best_cost is None or cost < self.best_cost:
+            self.best_cost = cost
+
+        threshold = self.policy.min_improvement * abs(self.reference_cost or 0)
+        if self.reference_cost is None or self.reference_cost - cost > threshold:
+            self.reference_cost = cost
+            self.last_improvement_time = time.monotonic()
+            self.solutions_since_improvement = 0
+        else:
+            self.solutions_since_improvement += 1
+
+    def should_stop(self):
+        """Retourne True si la recherche doit s'arrêter"""
+        if self.stop_reason is not None:
+            return True
+
+        if self.external_stop and self.external_stop():
+            self.stop_reason = 'cancelled'
+        elif self.best_cost is not None:
+            policy = self.policy
+            if policy.window_solutions is not None and \
+                    self.solutions_since_improvement >= policy.window_solutions:
+                self.stop_reason = 'plateau_solutions'
+            elif policy.window_seconds is not None:
+                now = time.monotonic()
+                window = max(
+                    policy.window_seconds,
+                    (policy.stall_ratio or 0) * (self.last_improvement_time - self.start_time)
+                )
+                if now - self.last_improvement_time >= window:
+                    self.stop_reason = 'plateau_time'
+
+        return self.stop_reason is not None
+
+    def finish(self):
+        """Clôt la recherche et retourne son bilan"""
+        elapsed = time.monotonic() - self.start_time
+        if self.stop_reason is None:
+            self.stop_reason = 'time_limit' if elapsed >= self.time_limit - 0.05 else 'completed'
+        return {
+            'stop_reason': self.stop_reason,
+            'solutions': self.solutions,
+            'best_cost': self.best_cost,
+            'elapsed': elapsed
+        }
@@ -0,0 +1,132 @@
+"""
+Partitionnement des points autour du dépôt pour la résolution par grappes
+(cluster-first, route-second)
+"""
+import math
+import numpy as np
+from distance_matrix import EARTH_RADIUS_KM
+
+
+def allocate_vehicles(num_vehicles, num_clusters):
+    """Répartit les véhicules entre les grappes (différence d'au plus un véhicule)"""
+    base, extra = divmod(num_vehicles, num_clusters)
+    return [base + (1 if i < extra else 0) for i in range(num_clusters)]
+
+
+def _project(depot, points):
+    """Projette les points dans un plan local en km centré sur le dépôt"""
+    lat0 = math.radians(depot[0])
+    lats = np.array([p['lat'] for p in points], dtype=np.float64)
+    lons = np.array([p['lon'] for p in points], dtype=np.float64)
+    y = np.radians(lats - depot[0]) * EARTH_RADIUS_KM
+    x = np.radians(lons - depot[1]) * EARTH_RADIUS_KM * math.cos(lat0)
+    return np.column_stack((x, y))
+
+
+def sweep_partition(depot, points, vehicle_counts, capacity):
+    """
+    Découpe les points en secteurs angulaires autour du dépôt
+
+    Le balayage commence au plus grand écart angulaire entre deux points et
+    chaque secteur reçoit une part de la demande proportionnelle à son nombre
+    de véhicules, sans dépasser leur capacité cumulée.
+
+    Returns:
+        list: Indices des points de chaque grappe
+    """
+    if not points:
+        return [[] for _ in vehicle_counts]
+
+    xy = _project(depot, points)
+    angles = np.arctan2(xy[:, 1], xy[:, 0])
+    order = np.argsort(angles)
+    sorted_angles = angles[order]
+    gaps = np.diff(np.append(sorted_angles, sorted_angles[0] + 2 * math.pi))
+    order = np.roll(order, -(int(np.argmax(gaps)) + 1))
+
+    demands = [points[i]['passengers'] for i in order]
+    total_demand = sum(demands)
+    total_vehicles = sum(vehicle_counts)
+
+    clusters = []
+    position = 0
+    for cluster_id, vehicles in enumerate(vehicle_counts):
+        cluster = []
+        load = 0
+        if cluster_id == len(vehicle_counts) - 1:
+            cluster = order[position:].tolist()
+        else:
+            target = total_demand * vehicles / total_vehicles
+            while position < len(order) and load < target and \
+                    load + demands[position] <= vehicles * capacity:
+                cluster.append(int(order[position]))
+                load += demands[position]
+                position += 1
+        clusters.append(cluster)
+    return clusters
+
+
+def kmeans_partition(depot, points, vehicle_counts, capacity, iterations=10):
+    """
+    Partitionne les points par k-moyennes sous contrainte de capacité
+
+    Les centres sont initialisés sur les secteurs du balayage. À chaque
+    itération, les points sont affectés par ordre de regret décroissant
+    (écart entre le centre le plus proche et le suivant) au centre le plus
+    proche dont la grappe a encore de la capacité.
+
+    Returns:
+        list: Indices des points de chaque grappe
+    """
+    clusters = sweep_partition(depot, points, vehicle_counts, capacity)
+    if len(vehicle_counts) < 2 or not points:
+        return clusters
+
+    xy = _project(depot, points)
+    demands = np.array([p['passengers'] for p in points])
+    limits = np.array(vehicle_counts) * capacity
+
+    for _ in range(iterations):
+        centers = np.array([
+            xy[cluster].mean(axis=0) if cluster else np.zeros(2)
+            for cluster in clusters
+        ])
+        distances = np.linalg.norm(xy[:, None, :] - centers[None, :, :], axis=2)
+        preferences = np.argsort(distances, axis=1)
+        ranked = np.sort(distances, axis=1)
+        regret = ranked[:, 1] - ranked[:, 0]
+
+        loads = np.zeros(len(clusters))
+        new_clusters = [[] for _ in clusters]
+        for i in np.argsort(-regret):
+            for cluster_id in preferences[i]:
+                if loads[cluster_id] + demands[i] <= limits[cluster_id]:
+                    break
+            else:
+                cluster_id = preferences[i][0]
+            new_clusters[cluster_id].append(int(i))
+            loads[cluster_id] += demands[i]
+
+        new_clusters = [sorted(cluster) for cluster in new_clusters]
+        if new_clusters == clusters:
+            break
+        clusters = new_clusters
+
+    return clusters
+
+
+def adjacent_pairs(depot, points, clusters):
+    """Retourne les couples de grappes voisines (ordonnées par angle de leur barycentre autour du dépôt)"""
+    non_empty = [i for i, cluster in enumerate(clusters) if cluster]
+    if len(non_empty) < 2:
+        return []
+
+    xy = _project(depot, points)
+    angles = {
+        i: math.atan2(*xy[clusters[i]].mean(axis=0)[::-1])
+        for i in non_empty
+    }
+    ordered = sorted(non_empty, key=angles.get)
+    if len(ordered) == 2:
+        return [(ordered[0], ordered[1])]
+    return [(ordered[i], ordered[(i + 1) % len(ordered)]) for i in range(len(ordered))]
@@ -0,0 +1,58 @@
+"""
+Calcul vectorisé des matrices de distance pour les solveurs VRP
+"""
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+
+
+def haversine_matrix(locations, dtype=np.int64):
+    """
+    Calcule la matrice des distances haversine entre tous les points
+
+    Args:
+        locations: Séquence de coordonnées (lat, lon) en degrés
+        dtype: Type entier de la matrice retournée (np.int32 ou np.int64)
+
+    Returns:
+        np.ndarray: Matrice carrée symétrique des distances en mètres
+    """
+    coords = np.radians(np.asarray(locations, dtype=np.float64).reshape(-1, 2))
+    num_locations = len(coords)
+    matrix = np.zeros((num_locations, num_locations), dtype=dtype)
+    if num_locations < 2:
+        return matrix
+
+    # La matrice étant symétrique, seul le triangle supérieur est calculé
+    rows, cols = np.triu_indices(num_locations, k=1)
+    lat1, lon1 = coords[rows, 0], coords[rows, 1]
+    lat2, lon2 = coords[cols, 0], coords[cols, 1]
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + \
+        np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    distances = 2 * np.arcsin(np.sqrt(a)) * EARTH_RADIUS_KM * 1000
+
+    matrix[rows, cols] = distances.astype(dtype)
+    matrix[cols, rows] = matrix[rows, cols]
+    return matrix
+
+
+
+def haversine_from(origin, locations):
+    """
+    Calcule les distances haversine d'un point vers plusieurs points
+
+    Args:
+        origin: Coordonnées (lat, lon) du point d'origine en degrés
+        locations: Séquence de coordonnées (lat, lon) en degrés
+
+    Returns:
+        np.ndarray: Distances en kilomètres
+    """
+    coords = np.radians(np.asarray(locations, dtype=np.float64).reshape(-1, 2))
+    lat1, lon1 = np.radians(origin[0]), np.radians(origin[1])
+    lat2, lon2 = coords[:, 0], coords[:, 1]
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + \
+        np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * np.arcsin(np.sqrt(a)) * EARTH_RADIUS_KM
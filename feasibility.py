@@ -0,0 +1,106 @@
+"""
+Pré-contrôle vectorisé de la faisabilité d'un problème, avant toute résolution OR-Tools
+"""
+import time
+import numpy as np
+from distance_matrix import haversine_from
+from time_windows import SERVICE_WINDOWS, HORIZON, parse_time, depot_departure
+
+
+def vehicle_lower_bound(demands, capacity):
+    """
+    Borne inférieure du nombre de véhicules (bin packing)
+
+    Maximum de la borne continue ceil(somme / capacité) et du nombre de points
+    de plus d'une demi-capacité, qui ne peuvent pas partager un véhicule deux à deux.
+    """
+    demands = np.asarray(demands, dtype=np.int64)
+    if not len(demands):
+        return 0
+    continuous = -(-int(demands.sum()) // capacity)
+    large = int(np.count_nonzero(2 * demands > capacity))
+    return max(continuous, large)
+
+
+def prescreen(depot_coords, points, num_vehicles, capacity, max_distance_km,
+              speed_kmh, service_minutes=0):
+    """
+    Recherche, sans résoudre, les causes d'infaisabilité certaine d'un problème
+
+    Les contrôles portent sur les tableaux des points : capacité de chaque point,
+    borne inférieure du nombre de véhicules, rayon autour du dépôt, créneaux
+    horaires et temps de trajet depuis le dépôt, quitté à la prise de service
+    (voir time_windows.depot_departure). speed_kmh doit majorer la vitesse
+    réelle : le trajet à vol d'oiseau donne alors un temps minimal et aucun
+    problème faisable n'est rejeté.
+
+    Returns:
+        dict: Diagnostic {'feasible', 'issues', bornes et totaux, 'elapsed_ms'} ;
+        chaque problème relevé est {'code', 'message', 'points'} (identifiants, 20 au plus)
+    """
+    start_time = time.perf_counter()
+    issues = []
+
+    def report(code, message, mask=None):
+        ids = [points[i].get('id', i) for i in np.flatnonzero(mask)[:20]] if mask is not None else []
+        issues.append({'code': code, 'message': message, 'points': ids})
+
+    demands = np.fromiter((p['passengers'] for p in points), dtype=np.int64, count=len(points))
+    total_capacity = num_vehicles * capacity
+    min_vehicles = vehicle_lower_bound(demands, capacity)
+
+    if not points:
+        report('no_points', "Aucun point à optimiser")
+    else:
+        oversized = demands > capacity
+        if oversized.any():
+            report('stop_capacity',
+                   f"{int(oversized.sum())} point(s) dépassent la capacité d'un véhicule ({capacity} places)",
+                   oversized)
+        if demands.sum() > total_capacity:
+            report('total_capacity',
+                   f"Capacité totale insuffisante. {int(demands.sum())} passagers pour {total_capacity} places")
+        elif min_vehicles > num_vehicles:
+            report('vehicle_count',
+                   f"Au moins {min_vehicles} véhicules nécessaires pour {num_vehicles} disponibles")
+
+        coords = np.array([(p['lat'], p['lon']) for p in points], dtype=np.float64)
+        distances = haversine_from(depot_coords, coords)
+        too_far = distances > max_distance_km
+        if too_far.any():
+            farthest = int(np.argmax(distances))
+            report('distance',
+                   f"Point {points[farthest]['name']} trop éloigné "
+                   f"({distances[farthest]:.2f} km > {max_distance_km} km)",
+                   too_far)
+
+        arrivals = np.fromiter((parse_time(p['arrival_time']) for p in points),
+                               dtype=np.int64, count=len(points))
+        window_ends = np.full(len(points), -1, dtype=np.int64)
+        for window_start, window_end in SERVICE_WINDOWS:
+            inside = (arrivals >= window_start) & (arrivals <= window_end)
+            window_ends[inside] = window_end
+        outside = window_ends < 0
+        if outside.any():
+            report('time_window',
+                   f"{int(outside.sum())} point(s) hors des créneaux 8h-12h / 14h-16h", outside)
+
+        # Temps de trajet minimal depuis le dépôt (vol d'oiseau à speed_kmh), départ à la prise de service
+        travel = np.ceil(distances * 60 / speed_kmh).astype(np.int64)
+        departure = depot_departure(arrivals.tolist())
+        earliest = np.maximum(departure + travel, arrivals)
+        late = ~outside & ((earliest > window_ends) | (earliest + service_minutes + travel > HORIZON))
+        if late.any():
+            report('travel_time',
+                   f"{int(late.sum())} point(s) inatteignable(s) depuis le dépôt dans leur créneau", late)
+
+    return {
+        'feasible': not issues,
+        'issues': issues,
+        'num_points': len(points),
+        'total_passengers': int(demands.sum()),
+        'total_capacity': total_capacity,
+        'num_vehicles': num_vehicles,
+        'min_vehicles': min_vehicles,
+        'elapsed_ms': round(1000 * (time.perf_counter() - start_time), 3)
+    }
@@ -0,0 +1,180 @@
+"""
+Gestionnaire de tâches exécutées dans un pool de processus, commun à l'API Flask et au backend
+"""
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+
+class JobContext:
+    """
+    Accès d'une tâche à son état partagé avec le processus parent :
+    progression, meilleure solution courante et demande d'annulation.
+    """
+
+    def __init__(self, state, cancel_event, poll_interval=0.2):
+        self._state = state
+        self._cancel_event = cancel_event
+        self._poll_interval = poll_interval
+        self._last_poll = 0
+        self._cancelled = False
+
+    def cancelled(self):
+        """Indique si l'annulation a été demandée (l'événement partagé est relu au plus toutes les poll_interval secondes)"""
+        now = time.monotonic()
+        if not self._cancelled and now - self._last_poll >= self._poll_interval:
+            self._last_poll = now
+            self._cancelled = self._cancel_event.is_set()
+        return self._cancelled
+
+    def report(self, **progress):
+        """Publie l'avancement de la tâche"""
+        self._state['progress'] = progress
+
+    def publish_best(self, solution):
+        """Publie la meilleure solution trouvée jusqu'ici"""
+        self._state['best'] = solution
+
+
+def _run_job(fn, state, cancel_event, args, kwargs):
+    state['status'] = 'running'
+    state['started_at'] = time.time()
+    return fn(JobContext(state, cancel_event), *args, **kwargs)
+
+
+class JobManager:
+    """
+    Gestionnaire de tâches exécutées dans un pool de processus borné.
+
+    Chaque tâche reçoit un JobContext en premier argument. Les tâches terminées
+    (résultat, erreur ou annulation) sont conservées ttl_seconds secondes.
+    """
+
+    def __init__(self, max_workers=2, ttl_seconds=3600):
+        self.max_workers = max_workers
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._executor = None
+        self._shared = None
+
+    def _start(self):
+        if self._executor is None:
+            self._shared = multiprocessing.Manager()
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Soumet une tâche et retourne immédiatement son identifiant
+
+        Args:
+            fn: Fonction de niveau module fn(context, *args, **kwargs), dont le résultat est picklable
+        """
+        self._purge_expired()
+        with self._lock:
+            self._start()
+            job_id = uuid.uuid4().hex
+            state = self._shared.dict(status='pending', started_at=None, progress={}, best=None)
+            cancel_event = self._shared.Event()
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'created_at': time.time(),
+                'finished_at': None,
+                'status': None,
+                'result': None,
+                'error': None,
+                'state': state,
+                'cancel_event': cancel_event,
+                'future': None
+            }
+            future = self._executor.submit(_run_job, fn, state, cancel_event, args, kwargs)
+            self._jobs[job_id]['future'] = future
+
+        future.add_done_callback(lambda f: self._on_done(job_id, f))
+        return job_id
+
+    def _on_done(self, job_id, future):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job['finished_at'] = time.time()
+            if future.cancelled():
+                job['status'] = 'cancelled'
+                return
+            error = future.exception()
+            if job['cancel_event'].is_set():
+                # Une tâche annulée avant sa première solution se termine par une exception
+                job['status'] = 'cancelled'
+                job['result'] = future.result() if error is None else None
+            elif error is not None:
+                job['status'] = 'failed'
+                job['error'] = str(error)
+            else:
+                job['status'] = 'done'
+                job['result'] = future.result()
+
+    def _purge_expired(self):
+        now = time.time()
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job['finished_at'] and now - job['finished_at'] > self.ttl_seconds
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def get(self, job_id):
+        """Retourne l'état d'une tâche, ou None si elle est inconnue ou expirée"""
+        self._purge_expired()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            state = dict(job['state'])
+            return {
+                'job_id': job_id,
+                'status': job['status'] or state['status'],
+                'created_at': job['created_at'],
+                'started_at': state['started_at'],
+                'finished_at': job['finished_at'],
+                'progress': state['progress'],
+                'best': state['best'],
+                'result': job['result'],
+                'error': job['error']
+            }
+
+    def cancel(self, job_id):
+        """
+        Annule une tâche : une tâche en attente est retirée du pool, une tâche
+        en cours s'arrête et conserve sa meilleure solution
+
+        Returns:
+            bool: False si la tâche est inconnue ou déjà terminée
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job['finished_at']:
+                return False
+            job['cancel_event'].set()
+            future = job['future']
+        future.cancel()
+        return True
+
+    def shutdown(self):
+        """Arrête le pool de processus"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._shared.shutdown()
+                self._executor = None
+                self._shared = None
+
+
+class CurrentAssignment:
+    """Lecture des valeurs de la solution en cours, pendant un callback de solution"""
+
+    def Value(self, var):
+        return var.Value()
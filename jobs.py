@@ -0,0 +1,50 @@
+"""
+Exécution asynchrone des optimisations dans un pool de processus
+"""
+import time
+from job_manager import CurrentAssignment
+from optimizer import RouteOptimizer
+from visualizer import RouteVisualizer
+
+
+def optimization_job(context, depot_coords, config, points, road_network=None, matrix_cache=None):
+    """
+    Tâche d'optimisation exécutée dans un processus du pool
+
+    Retourne les routes extraites (format RouteVisualizer.extract_routes)
+    et publie la progression et la meilleure solution à chaque amélioration.
+    Le réseau routier et le cache de matrices, s'ils sont fournis, sont rouverts
+    depuis leur répertoire dans le processus.
+    """
+    optimizer = RouteOptimizer(
+        depot_coords,
+        max_distance_km=config['max_distance_km'],
+        num_drivers=config['num_drivers'],
+        capacity_per_driver=config['capacity_per_driver']
+    )
+    optimizer.road_network = road_network
+    optimizer.matrix_cache = matrix_cache
+    visualizer = RouteVisualizer(depot_coords, config['max_distance_km'])
+    start_time = time.time()
+    search = {'solutions': 0, 'best_cost': None}
+
+    def on_solution(routing, manager, data):
+        search['solutions'] += 1
+        cost = routing.CostVar().Value()
+        if search['best_cost'] is None or cost < search['best_cost']:
+            search['best_cost'] = cost
+            context.publish_best(visualizer.extract_routes(
+                manager, routing, CurrentAssignment(), data))
+            context.report(
+                solutions=search['solutions'],
+                best_cost=cost,
+                elapsed=time.time() - start_time
+            )
+
+    manager, routing, solution, data = optimizer.solve(
+        points,
+        time_limit=config.get('time_limit', 120),
+        on_solution=on_solution,
+        should_stop=context.cancelled
+    )
+    return visualizer.extract_routes(manager, routing, solution, data)
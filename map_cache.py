@@ -0,0 +1,118 @@
+"""
+Cache des cartes HTML rendues à la demande, compressées en gzip
+"""
+import gzip
+import hashlib
+import os
+import threading
+
+
+class MapCache:
+    """
+    Cartes rendues paresseusement et conservées compressées dans cache_dir.
+
+    render(solution_id) retourne le HTML de la carte, ou None si la solution
+    est inconnue. Le rendu n'a lieu qu'à la première demande d'une solution ;
+    les demandes concurrentes de la même carte attendent ce rendu. Chaque
+    carte est associée à un ETag calculé sur son contenu. Une carte doit être
+    invalidée quand sa solution quitte le cache des solutions.
+    """
+
+    def __init__(self, render, cache_dir):
+        self.render = render
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.renders = 0
+        self._lock = threading.Lock()
+        self._render_locks = {}
+        self._etags = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, solution_id):
+        return os.path.join(self.cache_dir, f"{solution_id}.html.gz")
+
+    def _render_lock(self, solution_id):
+        with self._lock:
+            return self._render_locks.setdefault(solution_id, threading.Lock())
+
+    def _read(self, solution_id):
+        try:
+            with open(self._path(solution_id), 'rb') as f:
+                body = f.read()
+        except OSError:
+            return None
+        with self._lock:
+            etag = self._etags.get(solution_id)
+            if etag is None:
+                etag = self._etags[solution_id] = hashlib.sha256(body).hexdigest()[:32]
+        return etag, body
+
+    def get(self, solution_id):
+        """
+        Retourne la carte compressée d'une solution, rendue si nécessaire
+
+        Returns:
+            tuple: (etag, contenu gzip) ou None si la solution est inconnue
+        """
+        cached = self._read(solution_id)
+        if cached is not None:
+            with self._lock:
+                self.hits += 1
+            return cached
+
+        with self._render_lock(solution_id):
+            cached = self._read(solution_id)
+            if cached is not None:
+                with self._lock:
+                    self.hits += 1
+                return cached
+
+            html = self.render(solution_id)
+            if html is None:
+                with self._lock:
+                    self._render_locks.pop(solution_id, None)
+                return None
+
+            body = gzip.compress(html.encode('utf-8'), mtime=0)
+            tmp_path = f"{self._path(solution_id)}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, self._path(solution_id))
+            with self._lock:
+                self.renders += 1
+                self._etags[solution_id] = hashlib.sha256(body).hexdigest()[:32]
+            return self._etags[solution_id], body
+
+    def _solution_ids(self):
+        return [name[:-len('.html.gz')] for name in os.listdir(self.cache_dir) if name.endswith('.html.gz')]
+
+    def invalidate(self, solution_id=None):
+        """Supprime une carte (fichier, ETag et verrou de rendu), ou toutes les cartes si solution_id est None"""
+        with self._lock:
+            solution_ids = self._solution_ids() if solution_id is None else [solution_id]
+            if solution_id is None:
+                self._etags.clear()
+                self._render_locks.clear()
+            for sid in solution_ids:
+                self._etags.pop(sid, None)
+                self._render_locks.pop(sid, None)
+                try:
+                    os.remove(self._path(sid))
+                except OSError:
+                    pass
+
+    def retain(self, solution_ids):
+        """Supprime les cartes des solutions absentes de solution_ids (cartes orphelines au démarrage)"""
+        keep = set(solution_ids)
+        for solution_id in self._solution_ids():
+            if solution_id not in keep:
+                self.invalidate(solution_id)
+
+    def stats(self):
+        """Retourne les compteurs du cache"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'renders': self.renders,
+                'render_locks': len(self._render_locks)
+            }
@@ -0,0 +1,194 @@
+"""
+Cache disque des matrices de distances et de temps, adressé par leur contenu
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+def matrix_key(locations, metric):
+    """Empreinte de la liste ordonnée de coordonnées et de la métrique"""
+    digest = hashlib.sha256(metric.encode('utf-8'))
+    digest.update(np.ascontiguousarray(locations, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+class MatrixCache:
+    """
+    Cache LRU de matrices n x n, persisté dans cache_dir et borné en octets.
+
+    Chaque entrée est un tableau <empreinte>.npy de forme (m, n, n) (par exemple
+    distances et temps) relu en projection mémoire, accompagné de <empreinte>.json
+    (métrique et coordonnées). Une liste de coordonnées incluse dans une entrée
+    de même métrique est servie par indexation de la matrice en cache.
+    """
+
+    def __init__(self, cache_dir, max_bytes=256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.subset_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def __getstate__(self):
+        return {'cache_dir': self.cache_dir, 'max_bytes': self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state['cache_dir'], state['max_bytes'])
+
+    def _path(self, key, extension):
+        return os.path.join(self.cache_dir, f"{key}.{extension}")
+
+    def _load_index(self):
+        files = [
+            os.path.join(self.cache_dir, name)
+            for name in os.listdir(self.cache_dir) if name.endswith('.json')
+        ]
+        files.sort(key=os.path.getmtime)
+
+        for path in files:
+            key = os.path.basename(path)[:-len('.json')]
+            try:
+                with open(path, 'r') as f:
+                    meta = json.load(f)
+                nbytes = os.path.getsize(self._path(key, 'npy'))
+            except (OSError, ValueError):
+                continue
+            self._entries[key] = self._entry(meta, nbytes)
+        self._evict()
+
+    @staticmethod
+    def _entry(meta, nbytes):
+        return {
+            'metric': meta['metric'],
+            'positions': {tuple(coords): i for i, coords in enumerate(meta['locations'])},
+            'nbytes': nbytes
+        }
+
+    def _bytes(self):
+        return sum(entry['nbytes'] for entry in self._entries.values())
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        for extension in ('json', 'npy'):
+            try:
+                os.remove(self._path(key, extension))
+            except OSError:
+                pass
+
+    def _evict(self):
+        while len(self._entries) > 1 and self._bytes() > self.max_bytes:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+
+    def _read(self, key):
+        try:
+            matrices = np.load(self._path(key, 'npy'), mmap_mode='r')
+            os.utime(self._path(key, 'json'))
+        except (OSError, ValueError):
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return matrices
+
+    def _find_superset(self, locations, metric):
+        for key in reversed(self._entries):
+            entry = self._entries[key]
+            if entry['metric'] != metric or len(entry['positions']) < len(locations):
+                continue
+            try:
+                indices = np.array([entry['positions'][coords] for coords in locations])
+            except KeyError:
+                continue
+            return key, indices
+        return None, None
+
+    def get(self, locations, metric):
+        """
+        Retourne les matrices (m, n, n) de la liste de coordonnées, ou None
+
+        Une correspondance exacte est servie en projection mémoire ; un
+        sous-ensemble d'une entrée est extrait par indexation.
+        """
+        locations = [tuple(map(float, coords)) for coords in locations]
+        key = matrix_key(locations, metric)
+        with self._lock:
+            if key in self._entries:
+                matrices = self._read(key)
+                if matrices is not None:
+                    self.hits += 1
+                    return matrices
+
+            superset, indices = self._find_superset(locations, metric)
+            if superset is not None:
+                matrices = self._read(superset)
+                if matrices is not None:
+                    self.subset_hits += 1
+                    return matrices[:, indices[:, None], indices[None, :]]
+
+            self.misses += 1
+            return None
+
+    def put(self, locations, metric, matrices):
+        """Enregistre les matrices (m, n, n) calculées pour la liste de coordonnées"""
+        locations = [tuple(map(float, coords)) for coords in locations]
+        key = matrix_key(locations, metric)
+        matrices = np.ascontiguousarray(matrices)
+        meta = {'metric': metric, 'locations': [list(coords) for coords in locations]}
+        with self._lock:
+            tmp_path = f"{self._path(key, 'npy')}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, matrices)
+            os.replace(tmp_path, self._path(key, 'npy'))
+
+            # Les métadonnées sont écrites en dernier : elles valident l'entrée
+            tmp_path = f"{self._path(key, 'json')}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, self._path(key, 'json'))
+
+            self._entries[key] = self._entry(meta, os.path.getsize(self._path(key, 'npy')))
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def get_or_compute(self, locations, metric, compute):
+        """
+        Retourne les matrices en cache ou les calcule avec compute() et les enregistre
+
+        Args:
+            compute: Fonction sans argument retournant un tuple de matrices n x n
+        """
+        matrices = self.get(locations, metric)
+        if matrices is None:
+            matrices = np.stack(compute())
+            self.put(locations, metric, matrices)
+        return tuple(matrices)
+
+    def invalidate(self):
+        """Vide le cache et supprime ses fichiers"""
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def stats(self):
+        """Retourne les compteurs du cache"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'subset_hits': self.subset_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'bytes': self._bytes(),
+                'max_bytes': self.max_bytes
+            }
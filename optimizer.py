@@ -2,7 +2,20 @@ import numpy as np
 from ortools.constraint_solver import routing_enums_pb2
 from ortools.constraint_solver import pywrapcp
 from math import radians, cos, sin, asin, sqrt
+from distance_matrix import haversine_matrix
+from convergence import ConvergencePolicy
+from sparse_graph import SparseDistanceGraph, knn_graph
+from time_windows import (point_windows, travel_minutes, unreachable_nodes, add_time_dimension,
+                          WINDOW_WIDTH, WINDOW_PENALTY, SERVICE_MINUTES, AVERAGE_SPEED_KMH)
+from feasibility import prescreen
+from road_network import HIGHWAY_SPEEDS_KMH
+from decomposition import allocate_vehicles, sweep_partition, kmeans_partition, adjacent_pairs
+import copy
+import os
 import time
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 
 class RouteOptimizer:
     def __init__(self, depot_coords, max_distance_km=15, num_drivers=3, capacity_per_driver=8):
@@ -10,31 +23,39 @@ class RouteOptimizer:
         self.max_distance_km = max_distance_km
         self.num_drivers = num_drivers
         self.capacity_per_driver = capacity_per_driver
-        self.arrival_window = (8, 12) 
-        self.departure_window = (14, 16) 
+        self.window_width = WINDOW_WIDTH
+        self.window_penalty = WINDOW_PENALTY
+        self.service_minutes = SERVICE_MINUTES
+        self.average_speed_kmh = AVERAGE_SPEED_KMH
+        self.convergence_policy = ConvergencePolicy()
+        self.decomposition_threshold = 150
+        self.decomposition_method = 'sweep'
+        self.max_points_per_cluster = 100
+        self.sparse_threshold = 1000
+        self.sparse_neighbors = 20
+        self.road_network = None
+        self.matrix_cache = None
         
-    def validate_points(self, points):
-        """Valide les points avant l'optimisation"""
-        if not points:
-            raise ValueError("Aucun point à optimiser")
-            
-        total_passengers = sum(p['passengers'] for p in points)
-        total_capacity = self.num_drivers * self.capacity_per_driver
+    def prescreen(self, points):
+        """
+        Diagnostic de faisabilité du problème, calculé sans résoudre (voir feasibility.prescreen)
         
-        if total_passengers > total_capacity:
-            raise ValueError(
-                f"Capacité totale insuffisante. {total_passengers} passagers pour {total_capacity} places"
-            )
-            
-        for point in points:
-            distance = self.haversine(
-                self.depot_coords[1], self.depot_coords[0],
-                point['lon'], point['lat']
-            )
-            if distance > self.max_distance_km:
-                raise ValueError(
-                    f"Point {point['name']} trop éloigné ({distance:.2f} km > {self.max_distance_km} km)"
-                )
+        Avec un réseau routier, la vitesse maximale des voies sert de majorant
+        pour le temps de trajet minimal depuis le dépôt.
+        """
+        speed_kmh = max(HIGHWAY_SPEEDS_KMH.values()) if self.road_network is not None \
+            else self.average_speed_kmh
+        return prescreen(
+            self.depot_coords, points, self.num_drivers, self.capacity_per_driver,
+            self.max_distance_km, speed_kmh, self.service_minutes
+        )
+    
+    def validate_points(self, points):
+        """Valide les points avant l'optimisation (lève ValueError au premier problème relevé)"""
+        diagnostic = self.prescreen(points)
+        if not diagnostic['feasible']:
+            raise ValueError(diagnostic['issues'][0]['message'])
+        return diagnostic
     
     def haversine(self, lon1, lat1, lon2, lat2):
         """Calcule la distance en kilomètres entre deux points"""
@@ -49,18 +70,41 @@ class RouteOptimizer:
         
     def build_distance_matrix(self, locations):
         """Construit la matrice de distance entre tous les points"""
-        num_locations = len(locations)
-        matrix = np.zeros((num_locations, num_locations))
-        
-        for i in range(num_locations):
-            for j in range(num_locations):
-                if i != j:
-                    matrix[i][j] = self.haversine(
-                        locations[i][1], locations[i][0],
-                        locations[j][1], locations[j][0]
-                    ) * 1000
+        return haversine_matrix(locations)
+    
+    def cached_matrices(self, locations, metric, compute):
+        """Retourne les matrices compute(locations), lues dans matrix_cache s'il est configuré"""
+        if self.matrix_cache is None:
+            return compute(locations)
+        return self.matrix_cache.get_or_compute(locations, metric, lambda: compute(locations))
+    
+    def uses_sparse_graph(self, points):
+        """Indique si le problème est résolu sur le graphe creux des k plus proches voisins"""
+        return bool(self.sparse_threshold) and len(points) > self.sparse_threshold
+    
+    def fingerprint(self, points):
+        """
+        Calcule une empreinte stable du problème (dépôt, contraintes et points)
         
-        return matrix
+        Le réseau routier n'en fait partie que s'il sert au calcul des temps de trajet.
+        """
+        road_network = None
+        if self.road_network is not None and not self.uses_sparse_graph(points):
+            road_network = self.road_network.signature
+        problem = {
+            'depot': list(self.depot_coords),
+            'max_distance_km': self.max_distance_km,
+            'num_drivers': self.num_drivers,
+            'capacity_per_driver': self.capacity_per_driver,
+            'road_network': road_network,
+            'time': [self.window_width, self.window_penalty, self.service_minutes, self.average_speed_kmh],
+            'points': [
+                [p['id'], p['lat'], p['lon'], p['passengers'], p['arrival_time']]
+                for p in points
+            ]
+        }
+        payload = json.dumps(problem, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
     
     def prepare_data(self, points):
         """Prépare les données pour OR-Tools"""
@@ -68,35 +112,253 @@ class RouteOptimizer:
             self.validate_points(points)
             
             locations = [self.depot_coords] + [(p['lat'], p['lon']) for p in points]
-            distance_matrix = self.build_distance_matrix(locations)
+            time_matrix = None
+            if self.uses_sparse_graph(points):
+                if self.road_network is not None:
+                    print(f"Réseau routier ignoré au-delà de {self.sparse_threshold} points : "
+                          "graphe creux à vol d'oiseau")
+                distance_matrix = knn_graph(locations, self.sparse_neighbors)
+            elif self.road_network is not None:
+                # Distances et temps de trajet routiers (secondes arrondies à la minute supérieure)
+                metric = 'road:' + json.dumps(self.road_network.signature, sort_keys=True)
+                distance_matrix, travel_seconds = self.cached_matrices(
+                    locations, metric, self.road_network.travel_matrices)
+                time_matrix = -(-travel_seconds // 60)
+            else:
+                distance_matrix, = self.cached_matrices(
+                    locations, 'haversine', lambda locations: (self.build_distance_matrix(locations),))
+                time_matrix = travel_minutes(distance_matrix, self.average_speed_kmh)
             
-            demands = [0] 
-            time_windows = [(0, 24*60)]
+            demands = [0] + [p['passengers'] for p in points]
+            service_times = [0] + [self.service_minutes] * len(points)
+            time_windows, service_windows, _ = point_windows(points, self.window_width)
             
-            for p in points:
-                demands.append(p['passengers'])
-                arrival_time = list(map(int, p['arrival_time'].split(':')))
-                arrival_minutes = arrival_time[0] * 60 + arrival_time[1]
-                
-                if not (self.arrival_window[0] * 60 <= arrival_minutes <= self.arrival_window[1] * 60):
-                    arrival_minutes = self.arrival_window[0] * 60
-                
-                time_windows.append((arrival_minutes, arrival_minutes + 30))
+            if time_matrix is not None:
+                unreachable = unreachable_nodes(time_matrix, service_windows, service_times)
+                if len(unreachable):
+                    names = ', '.join(points[node - 1]['name'] for node in unreachable[:5])
+                    raise ValueError(f"{len(unreachable)} point(s) inatteignable(s) dans leur créneau : {names}")
             
-            return {
+            data = {
                 'distance_matrix': distance_matrix,
                 'demands': demands,
                 'vehicle_capacities': [self.capacity_per_driver] * self.num_drivers,
                 'num_vehicles': self.num_drivers,
                 'depot': 0,
                 'points': points,
-                'time_windows': time_windows
+                'service_times': service_times,
+                'time_windows': time_windows,
+                'service_windows': service_windows,
+                'window_penalty': self.window_penalty
             }
+            if time_matrix is not None:
+                data['time_matrix'] = time_matrix
+            else:
+                data['meters_per_minute'] = self.average_speed_kmh * 1000 / 60
+            return data
         except Exception as e:
             raise ValueError(f"Erreur lors de la préparation des données: {str(e)}")
     
-    def solve(self, points, time_limit=120, strategies=None):
-        """Résout le problème VRP avec plusieurs stratégies"""
+    def build_model(self, data):
+        """Construit le modèle OR-Tools (coûts, capacité et fenêtres horaires)"""
+        manager = pywrapcp.RoutingIndexManager(
+            len(data['distance_matrix']),
+            data['num_vehicles'],
+            0
+        )
+        routing = pywrapcp.RoutingModel(manager)
+        
+        if isinstance(data['distance_matrix'], SparseDistanceGraph):
+            # Graphe creux : pas de matrice dense, les arcs sont lus dans le graphe CSR
+            graph = data['distance_matrix']
+            
+            def distance_callback(from_index, to_index):
+                return graph.cost(manager.IndexToNode(from_index), manager.IndexToNode(to_index))
+            
+            meters_per_minute = data['meters_per_minute']
+            service_times = data['service_times']
+            
+            def time_callback(from_index, to_index):
+                from_node = manager.IndexToNode(from_index)
+                distance = graph.distance(from_node, manager.IndexToNode(to_index))
+                return service_times[from_node] + int(-(-distance // meters_per_minute))
+            
+            transit_callback_index = routing.RegisterTransitCallback(distance_callback)
+            time_callback_index = routing.RegisterTransitCallback(time_callback)
+        else:
+            # Transits enregistrés sous forme de matrices : évalués en C++ sans rappel Python
+            distance_matrix = np.asarray(data['distance_matrix'], dtype=np.int64)
+            transit_callback_index = routing.RegisterTransitMatrix(distance_matrix.tolist())
+            # Temps de trajet augmenté du temps de service au nœud de départ
+            time_matrix = np.asarray(data['time_matrix'], dtype=np.int64) + \
+                np.asarray(data['service_times'], dtype=np.int64)[:, None]
+            time_callback_index = routing.RegisterTransitMatrix(time_matrix.tolist())
+        
+        routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
+        
+        demand_callback_index = routing.RegisterUnaryTransitVector(
+            [int(demand) for demand in data['demands']])
+        routing.AddDimensionWithVehicleCapacity(
+            demand_callback_index,
+            0,
+            [cap * 3 for cap in data['vehicle_capacities']],
+            True,
+            'Capacity'
+        )
+        
+        add_time_dimension(
+            routing, manager, time_callback_index,
+            data['time_windows'], data['service_windows'], data['window_penalty']
+        )
+        
+        return manager, routing
+    
+    def search_parameters(self, strategy, metaheuristic, time_limit):
+        """Construit les paramètres de recherche OR-Tools"""
+        search_parameters = pywrapcp.DefaultRoutingSearchParameters()
+        search_parameters.first_solution_strategy = strategy
+        search_parameters.local_search_metaheuristic = metaheuristic
+        search_parameters.time_limit.seconds = max(1, int(time_limit))
+        return search_parameters
+    
+    def routes_from_solution(self, manager, routing, solution):
+        """Retourne la séquence des nœuds visités par chaque chauffeur (hors dépôt)"""
+        routes = []
+        for vehicle_id in range(routing.vehicles()):
+            route = []
+            index = solution.Value(routing.NextVar(routing.Start(vehicle_id)))
+            while not routing.IsEnd(index):
+                route.append(manager.IndexToNode(index))
+                index = solution.Value(routing.NextVar(index))
+            routes.append(route)
+        return routes
+    
+    def convergence_monitor(self, time_limit, should_stop=None, seeded=False):
+        """
+        Crée le moniteur d'arrêt d'une recherche (sans critère de plateau si convergence_policy vaut None)
+        
+        Pour une recherche amorcée (seeded), la fenêtre de plateau est proportionnelle au budget.
+        """
+        policy = self.convergence_policy or ConvergencePolicy(window_seconds=None, window_solutions=None)
+        if seeded:
+            policy = policy.scaled(time_limit)
+        return policy.monitor(time_limit, should_stop)
+    
+    def solution_from_routes(self, manager, routing, routes, search_parameters):
+        """Reconstruit une solution complète du modèle à partir des séquences de nœuds"""
+        routing.CloseModelWithParameters(search_parameters)
+        assignment = routing.ReadAssignmentFromRoutes(
+            [[manager.NodeToIndex(node) for node in route] for route in routes],
+            True
+        )
+        if assignment is None:
+            return None
+        return routing.RestoreAssignment(assignment)
+    
+    def seed_routes(self, previous_routes, data):
+        """
+        Projette des routes précédentes (listes d'identifiants de points par chauffeur)
+        sur les nœuds du problème courant
+        
+        Les points disparus sont retirés, les chauffeurs en trop libèrent leurs points,
+        et les points non desservis sont ajoutés par insertion au moindre coût en
+        respectant la capacité des véhicules.
+        """
+        node_of = {p['id']: node for node, p in enumerate(data['points'], start=1)}
+        matrix = data['distance_matrix']
+        demands = data['demands']
+        capacities = data['vehicle_capacities']
+        
+        routes = [[] for _ in range(data['num_vehicles'])]
+        placed = set()
+        for vehicle_id, point_ids in enumerate(previous_routes[:data['num_vehicles']]):
+            for point_id in point_ids:
+                node = node_of.get(point_id)
+                if node is not None and node not in placed:
+                    routes[vehicle_id].append(node)
+                    placed.add(node)
+        loads = [sum(demands[node] for node in route) for route in routes]
+        
+        for node in range(1, len(demands)):
+            if node in placed:
+                continue
+            best = None
+            for vehicle_id, route in enumerate(routes):
+                if loads[vehicle_id] + demands[node] > capacities[vehicle_id]:
+                    continue
+                stops = [0] + route + [0]
+                for position in range(len(stops) - 1):
+                    before, after = stops[position], stops[position + 1]
+                    added = matrix[before][node] + matrix[node][after] - matrix[before][after]
+                    if best is None or added < best[0]:
+                        best = (added, vehicle_id, position)
+            if best is None:
+                vehicle_id = loads.index(min(loads))
+                position = len(routes[vehicle_id])
+            else:
+                _, vehicle_id, position = best
+            routes[vehicle_id].insert(position, node)
+            loads[vehicle_id] += demands[node]
+            placed.add(node)
+        
+        return routes
+    
+    def _solve_warm(self, data, previous_routes, time_limit, on_solution=None, should_stop=None):
+        """Relance la recherche locale à partir des routes précédentes ; retourne None si elles ne sont pas exploitables"""
+        manager, routing = self.build_model(data)
+        monitor = self.convergence_monitor(time_limit, should_stop, seeded=True)
+        monitor.attach(routing)
+        if on_solution:
+            routing.AddAtSolutionCallback(lambda: on_solution(routing, manager, data))
+        
+        search_parameters = self.search_parameters(
+            routing_enums_pb2.FirstSolutionStrategy.AUTOMATIC,
+            routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH,
+            time_limit
+        )
+        routing.CloseModelWithParameters(search_parameters)
+        initial = routing.ReadAssignmentFromRoutes(
+            [[manager.NodeToIndex(node) for node in route]
+             for route in self.seed_routes(previous_routes, data)],
+            True
+        )
+        if initial is None:
+            print("Routes précédentes inutilisables, résolution complète")
+            return None
+        
+        start_time = time.time()
+        solution = routing.SolveFromAssignmentWithParameters(initial, search_parameters)
+        if not solution:
+            print("Aucune solution depuis les routes précédentes, résolution complète")
+            return None
+        
+        run = monitor.finish()
+        print(f"Warm start found solution with cost {solution.ObjectiveValue()} in {time.time() - start_time:.2f}s ({run['stop_reason']})")
+        data['search'] = {'stop_reason': run['stop_reason'], 'runs': [run], 'warm_start': True}
+        return manager, routing, solution, data
+    
+    def solve(self, points, time_limit=120, strategies=None, metaheuristics=None,
+              on_solution=None, should_stop=None, parallel=True, previous_routes=None):
+        """
+        Résout le problème VRP avec plusieurs stratégies
+        
+        Chaque combinaison stratégie initiale / métaheuristique est résolue sur sa propre
+        copie du modèle. En mode parallèle, chacune tourne dans un processus séparé avec
+        tout le budget de temps et la solution de coût minimal est retenue.
+        
+        Chaque recherche s'arrête dès que convergence_policy détecte un plateau de l'objectif ;
+        la raison de l'arrêt est enregistrée dans data['search'].
+        
+        on_solution(routing, manager, data) est appelé à chaque solution trouvée ;
+        should_stop() est interrogé pendant la recherche et l'interrompt s'il retourne True.
+        Ces callbacks ne pouvant pas franchir les processus, leur présence impose le mode séquentiel.
+        
+        previous_routes (identifiants de points par chauffeur, voir routes_from_details) sert de
+        solution initiale à la recherche locale ; à défaut de solution, la résolution complète est lancée.
+        
+        Au-delà de decomposition_threshold points, le problème est découpé en grappes
+        résolues indépendamment (voir _solve_decomposed).
+        """
         try:
             if strategies is None:
                 strategies = [
@@ -104,90 +366,301 @@ class RouteOptimizer:
                     routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC,
                     routing_enums_pb2.FirstSolutionStrategy.AUTOMATIC
                 ]
+            if metaheuristics is None:
+                metaheuristics = [
+                    routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+                ]
             
-            data = self.prepare_data(points)
-            manager = pywrapcp.RoutingIndexManager(
-                len(data['distance_matrix']),
-                data['num_vehicles'],
-                0
-            )
-            routing = pywrapcp.RoutingModel(manager)
-            
-            def distance_callback(from_index, to_index):
-                from_node = manager.IndexToNode(from_index)
-                to_node = manager.IndexToNode(to_index)
-                return int(data['distance_matrix'][from_node][to_node])
+            if self.decomposition_threshold and len(points) > self.decomposition_threshold \
+                    and not previous_routes and not (on_solution or should_stop):
+                num_clusters = min(self.num_drivers, -(-len(points) // self.max_points_per_cluster))
+                if num_clusters > 1:
+                    return self._solve_decomposed(points, num_clusters, time_limit)
             
-            transit_callback_index = routing.RegisterTransitCallback(distance_callback)
-            routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
-            
-            def demand_callback(from_index):
-                from_node = manager.IndexToNode(from_index)
-                return data['demands'][from_node]
-            
-            demand_callback_index = routing.RegisterUnaryTransitCallback(demand_callback)
-            routing.AddDimensionWithVehicleCapacity(
-                demand_callback_index,
-                0,
-                [cap * 3 for cap in data['vehicle_capacities']],
-                True,
-                'Capacity'
-            )
-            
-            def time_callback(from_index, to_index):
-                from_node = manager.IndexToNode(from_index)
-                to_node = manager.IndexToNode(to_index)
-                return int(data['distance_matrix'][from_node][to_node] * 2)  
+            data = self.prepare_data(points)
+            combinations = [(s, m) for s in strategies for m in metaheuristics]
             
-            time_callback_index = routing.RegisterTransitCallback(time_callback)
-            routing.AddDimension(
-                time_callback_index,
-                30, 
-                24 * 60, 
-                False,
-                'Time'
-            )
-            time_dimension = routing.GetDimensionOrDie('Time')
+            if previous_routes:
+                result = self._solve_warm(data, previous_routes, time_limit, on_solution, should_stop)
+                if result:
+                    return result
             
-            for location_idx, time_window in enumerate(data['time_windows']):
-                index = manager.NodeToIndex(location_idx)
-                time_dimension.CumulVar(index).SetRange(time_window[0], time_window[1])
+            if parallel and len(combinations) > 1 and not (on_solution or should_stop):
+                return self._solve_parallel(data, combinations, time_limit)
             
-            best_solution = None
+            best = None
             best_cost = float('inf')
-            best_strategy = None
+            best_combination = None
+            runs = []
+            run_time_limit = time_limit // len(combinations)
             
-            search_parameters = pywrapcp.DefaultRoutingSearchParameters()
-            search_parameters.local_search_metaheuristic = (
-                routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
-            )
-            search_parameters.time_limit.seconds = time_limit // len(strategies)
-            
-            for strategy in strategies:
-                search_parameters.first_solution_strategy = strategy
+            for strategy, metaheuristic in combinations:
+                manager, routing = self.build_model(data)
+                monitor = self.convergence_monitor(run_time_limit, should_stop)
+                monitor.attach(routing)
+                
+                if on_solution:
+                    routing.AddAtSolutionCallback(
+                        lambda routing=routing, manager=manager: on_solution(routing, manager, data))
+                
+                search_parameters = self.search_parameters(
+                    strategy, metaheuristic, run_time_limit)
                 start_time = time.time()
                 solution = routing.SolveWithParameters(search_parameters)
                 solve_time = time.time() - start_time
+                run = dict(monitor.finish(), strategy=strategy, metaheuristic=metaheuristic)
+                runs.append(run)
                 
                 if solution:
                     cost = solution.ObjectiveValue()
-                    print(f"Strategy {strategy} found solution with cost {cost} in {solve_time:.2f}s")
+                    print(f"Strategy {strategy} found solution with cost {cost} in {solve_time:.2f}s ({run['stop_reason']})")
                     
                     if cost < best_cost:
                         best_cost = cost
-                        best_solution = solution
-                        best_strategy = strategy
+                        best = (manager, routing, solution)
+                        best_combination = (strategy, metaheuristic)
+                        data['search'] = {'stop_reason': run['stop_reason'], 'runs': runs}
                 else:
                     print(f"Strategy {strategy} found no solution")
+                
+                if should_stop and should_stop():
+                    print("Recherche interrompue")
+                    break
             
-            print(f"Best strategy: {best_strategy} with cost {best_cost}")
+            print(f"Best strategy: {best_combination} with cost {best_cost}")
             
-            if not best_solution:
+            if not best:
                 raise ValueError(
                     "Impossible de trouver une solution. Essayez d'augmenter le nombre de chauffeurs ou la capacité."
                 )
             
-            return manager, routing, best_solution, data
+            manager, routing, solution = best
+            return manager, routing, solution, data
             
         except Exception as e:
-            raise ValueError(f"Erreur lors de l'optimisation: {str(e)}")
\ No newline at end of file
+            raise ValueError(f"Erreur lors de l'optimisation: {str(e)}")
+    
+    def _solve_parallel(self, data, combinations, time_limit):
+        """Résout chaque combinaison dans un processus séparé et reconstruit la meilleure solution"""
+        max_workers = min(len(combinations), os.cpu_count() or 1)
+        rounds = -(-len(combinations) // max_workers)
+        worker_time_limit = time_limit // rounds
+        
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(_solve_combination, self, data, strategy, metaheuristic, worker_time_limit)
+                for strategy, metaheuristic in combinations
+            ]
+            results = []
+            for (strategy, metaheuristic), future in zip(combinations, futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    # Un processus en échec compte comme une combinaison sans solution
+                    print(f"Strategy {strategy} failed: {e}")
+                    results.append((None, None, {'stop_reason': 'error', 'solutions': 0,
+                                                 'best_cost': None, 'elapsed': 0.0}))
+        
+        best = None
+        runs = []
+        for (strategy, metaheuristic), (cost, routes, run) in zip(combinations, results):
+            run = dict(run, strategy=strategy, metaheuristic=metaheuristic)
+            runs.append(run)
+            if cost is None:
+                print(f"Strategy {strategy} found no solution")
+                continue
+            print(f"Strategy {strategy} found solution with cost {cost} in {run['elapsed']:.2f}s ({run['stop_reason']})")
+            if best is None or cost < best[0]:
+                best = (cost, routes, strategy, metaheuristic)
+                data['search'] = {'stop_reason': run['stop_reason'], 'runs': runs}
+        
+        if best is None:
+            raise ValueError(
+                "Impossible de trouver une solution. Essayez d'augmenter le nombre de chauffeurs ou la capacité."
+            )
+        
+        cost, routes, strategy, metaheuristic = best
+        print(f"Best strategy: {(strategy, metaheuristic)} with cost {cost}")
+        
+        manager, routing = self.build_model(data)
+        solution = self.solution_from_routes(
+            manager, routing, routes,
+            self.search_parameters(strategy, metaheuristic, worker_time_limit)
+        )
+        if solution is None:
+            raise ValueError("Impossible de reconstruire la meilleure solution")
+        return manager, routing, solution, data
+
+
+    def _solve_monolithic(self, points, time_limit):
+        """Résout le problème entier sans découpage (repli lorsqu'une grappe n'a pas de solution)"""
+        optimizer = copy.copy(self)
+        optimizer.decomposition_threshold = None
+        return optimizer.solve(points, time_limit=time_limit)
+
+    def _solve_decomposed(self, points, num_clusters, time_limit):
+        """
+        Résolution par grappes (cluster-first, route-second)
+        
+        Les points sont partitionnés autour du dépôt (balayage angulaire ou k-moyennes
+        sous contrainte de capacité), chaque grappe est résolue comme un VRP indépendant
+        avec sa part des véhicules dans un processus séparé, puis chaque couple de grappes
+        voisines est re-résolu à partir des routes courantes pour échanger les points
+        de frontière. Les routes obtenues sont rassemblées dans le modèle global.
+        """
+        self.validate_points(points)
+        
+        vehicle_counts = allocate_vehicles(self.num_drivers, num_clusters)
+        partition = kmeans_partition if self.decomposition_method == 'kmeans' else sweep_partition
+        partition_indices = partition(self.depot_coords, points, vehicle_counts, self.capacity_per_driver)
+        clusters = [[points[i] for i in cluster] for cluster in partition_indices]
+        
+        max_workers = min(num_clusters, os.cpu_count() or 1)
+        rounds = -(-num_clusters // max_workers)
+        cluster_time_limit = max(1, int(time_limit * 0.7) // rounds)
+        
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(_solve_cluster, self, cluster, vehicles, cluster_time_limit)
+                for cluster, vehicles in zip(clusters, vehicle_counts)
+            ]
+            results = []
+            for cluster_id, future in enumerate(futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    print(f"Grappe {cluster_id} sans solution : {e}")
+                    results.append(None)
+        if None in results:
+            print("Décomposition abandonnée, résolution sans découpage")
+            return self._solve_monolithic(points, time_limit)
+        cluster_routes = [routes for routes, _ in results]
+        cluster_costs = [sum(costs) for _, costs in results]
+        print(f"Décomposition en {num_clusters} grappes, coût initial {sum(cluster_costs)}")
+        
+        pairs = adjacent_pairs(self.depot_coords, points, partition_indices)
+        exchange_time_limit = max(1, int(time_limit * 0.3) // max(1, len(pairs)))
+        exchanges = 0
+        
+        for a, b in pairs:
+            merged = clusters[a] + clusters[b]
+            try:
+                routes, costs = _solve_cluster(
+                    self, merged, vehicle_counts[a] + vehicle_counts[b],
+                    exchange_time_limit, cluster_routes[a] + cluster_routes[b]
+                )
+            except ValueError as e:
+                print(f"Échange entre les grappes {a} et {b} ignoré : {e}")
+                continue
+            if sum(costs) >= cluster_costs[a] + cluster_costs[b]:
+                continue
+            
+            by_id = {p['id']: p for p in merged}
+            routes_a, routes_b = routes[:vehicle_counts[a]], routes[vehicle_counts[a]:]
+            points_a = [by_id[i] for route in routes_a for i in route]
+            points_b = [by_id[i] for route in routes_b for i in route]
+            if sum(p['passengers'] for p in points_a) > vehicle_counts[a] * self.capacity_per_driver or \
+                    sum(p['passengers'] for p in points_b) > vehicle_counts[b] * self.capacity_per_driver:
+                continue
+            
+            cluster_routes[a], cluster_routes[b] = routes_a, routes_b
+            cluster_costs[a], cluster_costs[b] = sum(costs[:vehicle_counts[a]]), sum(costs[vehicle_counts[a]:])
+            clusters[a], clusters[b] = points_a, points_b
+            exchanges += 1
+        
+        print(f"Échanges aux frontières : {exchanges}/{len(pairs)}, coût final {sum(cluster_costs)}")
+        
+        data = self.prepare_data(points)
+        node_of = {p['id']: node for node, p in enumerate(points, start=1)}
+        manager, routing = self.build_model(data)
+        solution = self.solution_from_routes(
+            manager, routing,
+            [[node_of[i] for i in route] for routes in cluster_routes for route in routes],
+            self.search_parameters(
+                routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC,
+                routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH,
+                time_limit
+            )
+        )
+        if solution is None:
+            print("Routes des grappes non assemblables, résolution sans découpage")
+            return self._solve_monolithic(points, time_limit)
+        
+        data['search'] = {
+            'stop_reason': 'decomposition',
+            'clusters': num_clusters,
+            'method': self.decomposition_method,
+            'exchanges': exchanges
+        }
+        return manager, routing, solution, data
+
+
+def _solve_cluster(optimizer, points, num_vehicles, time_limit, previous_routes=None):
+    """
+    Résout une grappe comme un VRP indépendant (exécuté dans un processus du pool)
+    
+    Retourne les routes (identifiants de points par chauffeur) et le coût de chacune.
+    """
+    if not points:
+        return [[] for _ in range(num_vehicles)], [0] * num_vehicles
+    
+    sub_optimizer = copy.copy(optimizer)
+    sub_optimizer.num_drivers = num_vehicles
+    sub_optimizer.decomposition_threshold = None
+    manager, routing, solution, data = sub_optimizer.solve(
+        points,
+        time_limit=time_limit,
+        strategies=[routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC],
+        parallel=False,
+        previous_routes=previous_routes
+    )
+    
+    routes = []
+    costs = []
+    for vehicle_id in range(routing.vehicles()):
+        route = []
+        cost = 0
+        index = routing.Start(vehicle_id)
+        while not routing.IsEnd(index):
+            next_index = solution.Value(routing.NextVar(index))
+            cost += int(data['distance_matrix'][manager.IndexToNode(index)][manager.IndexToNode(next_index)])
+            index = next_index
+            if not routing.IsEnd(index):
+                route.append(data['points'][manager.IndexToNode(index) - 1]['id'])
+        routes.append(route)
+        costs.append(cost)
+    return routes, costs
+
+
+def _solve_combination(optimizer, data, strategy, metaheuristic, time_limit):
+    """
+    Résout le problème avec une combinaison stratégie / métaheuristique (exécuté dans un processus du pool)
+    
+    Retourne (coût, routes, bilan de la recherche) ; coût et routes valent None
+    si aucune solution n'est trouvée.
+    """
+    manager, routing = optimizer.build_model(data)
+    monitor = optimizer.convergence_monitor(time_limit)
+    monitor.attach(routing)
+    solution = routing.SolveWithParameters(
+        optimizer.search_parameters(strategy, metaheuristic, time_limit))
+    if not solution:
+        return None, None, monitor.finish()
+    return (
+        solution.ObjectiveValue(),
+        optimizer.routes_from_solution(manager, routing, solution),
+        monitor.finish()
+    )
+
+
+def routes_from_details(routes_details):
+    """
+    Reconstitue les routes (identifiants de points par chauffeur, dans l'ordre de passage)
+    depuis routes_details de RouteVisualizer.extract_routes ou les lignes de routes_optimisees.csv
+    """
+    routes = {}
+    for stop in sorted(routes_details, key=lambda d: (d['driver_id'], d['stop_number'])):
+        routes.setdefault(int(stop['driver_id']), []).append(int(stop['point_id']))
+    if not routes:
+        return []
+    return [routes.get(driver_id, []) for driver_id in range(max(routes) + 1)]
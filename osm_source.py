@@ -0,0 +1,162 @@
+"""
+Lecture en flux des données OSM (GeoJSON) et sélection des points de ramassage autour du dépôt
+
+Module sans effet de bord à l'import : partagé par script.py et l'API.
+"""
+import os
+import random
+import ijson
+from spatial_index import SpatialIndex
+
+
+def iter_osm_features(geojson_file):
+    """
+    Parcourt les features du fichier GeoJSON une par une sans charger tout le fichier
+    """
+    with open(geojson_file, 'rb') as f:
+        for feature in ijson.items(f, 'features.item', use_float=True):
+            yield feature
+
+
+def feature_coords(feature):
+    """
+    Extrait les coordonnées (lat, lon) représentatives d'une feature GeoJSON
+    """
+    coords = None
+
+    if feature['geometry']['type'] == 'Point':
+        coords = (feature['geometry']['coordinates'][1], feature['geometry']['coordinates'][0])
+    elif feature['geometry']['type'] == 'Polygon' and len(feature['geometry']['coordinates'][0]) > 0:
+        coords = (feature['geometry']['coordinates'][0][0][1], feature['geometry']['coordinates'][0][0][0])
+    elif feature['geometry']['type'] == 'MultiPolygon' and len(feature['geometry']['coordinates']) > 0 and len(feature['geometry']['coordinates'][0]) > 0:
+        coords = (feature['geometry']['coordinates'][0][0][0][1], feature['geometry']['coordinates'][0][0][0][0])
+
+    return coords
+
+
+def feature_poi_type(feature):
+    """
+    Détermine le type de point d'intérêt d'une feature GeoJSON
+    """
+    poi_type = None
+    if 'highway' in feature['properties']:
+        poi_type = feature['properties']['highway']
+    elif 'amenity' in feature['properties']:
+        poi_type = feature['properties']['amenity']
+    else:
+        for key in ['name', 'building', 'shop', 'leisure', 'tourism']:
+            if key in feature['properties']:
+                poi_type = f"{key}:{feature['properties'][key]}"
+                break
+
+        if not poi_type:
+            poi_type = feature['geometry']['type']
+
+    return poi_type
+
+
+def build_osm_index(geojson_file):
+    """
+    Construit l'index spatial des features OSM
+
+    Seules les coordonnées et la position de chaque feature dans le fichier sont
+    conservées : les propriétés des points retenus sont relues par read_features.
+    """
+    index = SpatialIndex()
+    for position, feature in enumerate(iter_osm_features(geojson_file)):
+        coords = feature_coords(feature)
+        if coords:
+            index.insert(coords[0], coords[1], position)
+    return index
+
+
+def read_features(geojson_file, positions):
+    """
+    Relit en flux le type et le nom des features aux positions demandées
+
+    Returns:
+        dict: position -> (type de point d'intérêt, nom ou None)
+    """
+    wanted = set(positions)
+    found = {}
+    if not wanted:
+        return found
+    last = max(wanted)
+    for position, feature in enumerate(iter_osm_features(geojson_file)):
+        if position in wanted:
+            found[position] = (feature_poi_type(feature), feature['properties'].get('name'))
+        if position >= last:
+            break
+    return found
+
+
+_osm_index = {'key': None, 'index': None}
+
+
+def get_osm_index(geojson_file):
+    """
+    Retourne l'index spatial du fichier GeoJSON, reconstruit seulement si le fichier a changé
+
+    Seul l'index du dernier fichier demandé est conservé en mémoire.
+    """
+    stat = os.stat(geojson_file)
+    key = (os.path.abspath(geojson_file), stat.st_mtime_ns, stat.st_size)
+    if _osm_index['key'] != key:
+        _osm_index['index'] = None
+        _osm_index['index'] = build_osm_index(geojson_file)
+        _osm_index['key'] = key
+    return _osm_index['index']
+
+
+def load_osm_data(geojson_file, chateau_coords, max_distance_km, max_points=30, index=None):
+    """
+    Charge les données OSM et filtre les points dans le rayon maximum
+    """
+    if index is None:
+        index = get_osm_index(geojson_file)
+
+    points = []
+    point_id = 0
+
+    for entry_id, distance in index.query_radius(chateau_coords, max_distance_km):
+        lat, lon = index.coords()[entry_id]
+
+        passengers = random.randint(1, 3)
+
+        arrival_hour = random.randint(8, 11)
+        arrival_minute = random.randint(0, 59)
+        if arrival_hour == 11 and arrival_minute > 30:
+            arrival_minute = 30  
+        arrival_time = f"{arrival_hour:02d}:{arrival_minute:02d}"
+
+        point = {
+            'id': point_id,
+            'lat': float(lat),
+            'lon': float(lon),
+            'passengers': passengers,
+            'distance_to_chateau': distance,
+            'arrival_time': arrival_time,
+            'position': index.items[entry_id]
+        }
+
+        # Échantillonnage par réservoir : seuls max_points points sont gardés en mémoire
+        if len(points) < max_points:
+            points.append(point)
+        else:
+            slot = random.randint(0, point_id)
+            if slot < max_points:
+                points[slot] = point
+
+        point_id += 1
+
+    # Type et nom relus dans le fichier pour les seuls points retenus
+    features = read_features(geojson_file, [point['position'] for point in points])
+    for point in points:
+        poi_type, name = features[point.pop('position')]
+        point['poi_type'] = poi_type
+        point['name'] = name if name is not None else f"Point {point['id']}"
+
+    if point_id > max_points:
+        random.shuffle(points)
+
+    return points
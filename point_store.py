@@ -0,0 +1,192 @@
+"""
+Stockage binaire en colonnes des points de ramassage validés
+"""
+import json
+import os
+import threading
+import numpy as np
+
+POINT_DTYPE = np.dtype([
+    ('id', np.int32),
+    ('lat', np.float64),
+    ('lon', np.float64),
+    ('passengers', np.int16),
+    ('arrival_minutes', np.int16),
+    ('distance_to_chateau', np.float64),
+    ('poi_type', np.int32),
+    ('name', np.int32),
+])
+
+RECORDS_FILE = 'points.npy'
+STRINGS_FILE = 'strings.npy'
+META_FILE = 'meta.json'
+
+
+def source_signature(source_file):
+    """Retourne la signature (chemin, mtime, taille) du fichier source"""
+    stat = os.stat(source_file)
+    return {
+        'source': os.path.abspath(source_file),
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size
+    }
+
+
+def _save_npy(path, array):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+class PointStore:
+    """
+    Points validés stockés sous forme de tableau structuré NumPy projeté en mémoire.
+
+    Les champs texte (poi_type, name) sont internés dans une table de chaînes
+    et référencés par indice. L'heure d'arrivée est stockée en minutes.
+    """
+
+    def __init__(self, records, strings):
+        self.records = records
+        self.strings = strings
+
+    def __len__(self):
+        return len(self.records)
+
+    @classmethod
+    def open(cls, store_dir, source_file):
+        """
+        Ouvre le stock en projection mémoire s'il correspond encore au fichier source
+
+        Returns:
+            PointStore ou None si le stock est absent ou périmé
+        """
+        try:
+            with open(os.path.join(store_dir, META_FILE), 'r') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if meta != source_signature(source_file):
+            return None
+
+        records = np.load(os.path.join(store_dir, RECORDS_FILE), mmap_mode='r')
+        strings = np.load(os.path.join(store_dir, STRINGS_FILE), mmap_mode='r')
+        return cls(records, strings)
+
+    @classmethod
+    def build(cls, store_dir, source_file, points):
+        """Construit le stock à partir de points déjà validés et l'associe au fichier source"""
+        strings = []
+        string_ids = {}
+
+        def intern(value):
+            value = str(value)
+            if value not in string_ids:
+                string_ids[value] = len(strings)
+                strings.append(value)
+            return string_ids[value]
+
+        records = np.zeros(len(points), dtype=POINT_DTYPE)
+        for i, point in enumerate(points):
+            hours, minutes = map(int, point['arrival_time'].split(':'))
+            records[i] = (
+                point['id'],
+                point['lat'],
+                point['lon'],
+                point['passengers'],
+                hours * 60 + minutes,
+                point.get('distance_to_chateau', 0.0),
+                intern(point.get('poi_type', '')),
+                intern(point.get('name', f"Point {point['id']}"))
+            )
+
+        os.makedirs(store_dir, exist_ok=True)
+        meta_path = os.path.join(store_dir, META_FILE)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+
+        _save_npy(os.path.join(store_dir, RECORDS_FILE), records)
+        _save_npy(os.path.join(store_dir, STRINGS_FILE), np.array(strings or [''], dtype=str))
+
+        # Les métadonnées sont écrites en dernier : elles valident le stock
+        with open(f"{meta_path}.tmp", 'w') as f:
+            json.dump(source_signature(source_file), f)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+        return cls.open(store_dir, source_file)
+
+    def to_points(self):
+        """Convertit le stock en liste de dictionnaires au format des points"""
+        strings = self.strings.tolist()
+        columns = zip(
+            self.records['id'].tolist(),
+            self.records['lat'].tolist(),
+            self.records['lon'].tolist(),
+            self.records['passengers'].tolist(),
+            self.records['distance_to_chateau'].tolist(),
+            self.records['poi_type'].tolist(),
+            self.records['arrival_minutes'].tolist(),
+            self.records['name'].tolist()
+        )
+        return [
+            {
+                'id': point_id,
+                'lat': lat,
+                'lon': lon,
+                'passengers': passengers,
+                'distance_to_chateau': distance,
+                'poi_type': strings[poi_type],
+                'arrival_time': f"{arrival // 60:02d}:{arrival % 60:02d}",
+                'name': strings[name]
+            }
+            for point_id, lat, lon, passengers, distance, poi_type, arrival, name in columns
+        ]
+
+
+class PointCache:
+    """
+    Cache en mémoire (au niveau du processus) de la liste des points validés.
+
+    L'entrée est associée à la signature (mtime, taille) du fichier source et
+    rechargée automatiquement dès qu'elle change. La liste retournée est
+    partagée entre les requêtes et ne doit pas être modifiée.
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._key = None
+        self._points = None
+
+    def get(self, source_file):
+        """Retourne les points du cache, rechargés via loader() si le fichier source a changé"""
+        key = source_signature(source_file)
+        with self._lock:
+            if self._points is not None and self._key == key:
+                self.hits += 1
+                return self._points
+
+            self.misses += 1
+            self._points = self.loader()
+            self._key = key
+            return self._points
+
+    def invalidate(self):
+        """Vide le cache"""
+        with self._lock:
+            self._key = None
+            self._points = None
+
+    def stats(self):
+        """Retourne les compteurs du cache"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._points) if self._points is not None else 0,
+                'source': self._key['source'] if self._key else None
+            }
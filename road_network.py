@@ -0,0 +1,425 @@
+"""
+Réseau routier construit à partir des voies OSM (highway) du GeoJSON :
+graphe orienté persistant et matrices de temps de trajet par Dijkstra
+"""
+import heapq
+import json
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+import ijson
+from distance_matrix import EARTH_RADIUS_KM
+from point_store import source_signature
+from spatial_index import SpatialIndex
+
+# Vitesses moyennes (km/h) par type de voie ; les autres types ne sont pas carrossables
+HIGHWAY_SPEEDS_KMH = {
+    'motorway': 110, 'motorway_link': 60,
+    'trunk': 90, 'trunk_link': 50,
+    'primary': 70, 'primary_link': 40,
+    'secondary': 60, 'secondary_link': 40,
+    'tertiary': 50, 'tertiary_link': 30,
+    'unclassified': 40,
+    'residential': 30,
+    'living_street': 10,
+    'service': 20,
+    'road': 30,
+    'track': 15,
+}
+
+# Vitesse du trajet entre un point et le nœud du réseau le plus proche
+ACCESS_SPEED_KMH = 20
+# Paires sans chemin routier : distance à vol d'oiseau majorée, à vitesse urbaine
+DETOUR_FACTOR = 1.3
+FALLBACK_SPEED_KMH = 30
+# Nombre de nœuds sources dont les plus courts chemins restent en mémoire (LRU)
+MAX_PATH_SOURCES = 1024
+
+NODES_FILE = 'nodes.npy'
+INDPTR_FILE = 'indptr.npy'
+TARGETS_FILE = 'targets.npy'
+TIMES_FILE = 'times.npy'
+LENGTHS_FILE = 'lengths.npy'
+REACHABLE_FILE = 'reachable.npy'
+META_FILE = 'meta.json'
+
+
+def _save_npy(path, array):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def _haversine_m(lat1, lon1, lat2, lon2):
+    """Distances haversine en mètres entre tableaux de coordonnées (en degrés)"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + \
+        np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * np.arcsin(np.sqrt(a)) * EARTH_RADIUS_KM * 1000
+
+
+def _way_speed(properties):
+    """Vitesse d'une voie (maxspeed numérique, sinon vitesse du type), None si non carrossable"""
+    speed = HIGHWAY_SPEEDS_KMH.get(properties.get('highway'))
+    if speed is None:
+        return None
+    maxspeed = str(properties.get('maxspeed', '')).split(' ')[0]
+    if maxspeed.isdigit() and int(maxspeed) > 0:
+        return min(speed, int(maxspeed))
+    return speed
+
+
+def _way_direction(properties):
+    """1 : sens de la géométrie seulement, -1 : sens inverse seulement, 0 : double sens"""
+    oneway = str(properties.get('oneway', 'no')).lower()
+    if oneway == '-1':
+        return -1
+    if oneway in ('yes', 'true', '1') or properties.get('junction') == 'roundabout':
+        return 1
+    return 0
+
+
+def iter_highway_ways(geojson_file):
+    """Parcourt en flux les voies carrossables du GeoJSON : (coordonnées lon/lat, vitesse, sens)"""
+    with open(geojson_file, 'rb') as f:
+        for feature in ijson.items(f, 'features.item', use_float=True):
+            geometry = feature.get('geometry') or {}
+            properties = feature.get('properties') or {}
+            speed = _way_speed(properties)
+            if speed is None:
+                continue
+            if geometry.get('type') == 'LineString':
+                lines = [geometry['coordinates']]
+            elif geometry.get('type') == 'MultiLineString':
+                lines = geometry['coordinates']
+            else:
+                continue
+            direction = _way_direction(properties)
+            for line in lines:
+                if len(line) >= 2:
+                    yield line, speed, direction
+
+
+class RoadNetwork:
+    """
+    Graphe routier orienté au format CSR (indptr, targets, temps en secondes, longueurs en mètres).
+
+    Les nœuds de degré 2 internes aux voies sont fusionnés dans les arcs : seuls
+    les carrefours et les extrémités des voies sont conservés. reachable marque
+    la plus grande composante connexe, seule utilisée pour accrocher les points.
+
+    Le graphe est stocké dans store_dir (tableaux .npy projetés en mémoire) et
+    associé au fichier source ; seul ce chemin est transmis aux processus du pool.
+    Les plus courts chemins calculés sont conservés pour les MAX_PATH_SOURCES
+    derniers nœuds sources, sous verrou : le graphe est partagé entre threads.
+    """
+
+    def __init__(self, nodes, indptr, targets, times, lengths, reachable,
+                 store_dir=None, signature=None):
+        self.nodes = nodes
+        self.indptr = indptr
+        self.targets = targets
+        self.times = times
+        self.lengths = lengths
+        self.reachable = reachable
+        self.store_dir = store_dir
+        self.signature = signature
+        self._adjacency = None
+        self._snap_index = None
+        self._paths = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __getstate__(self):
+        if self.store_dir is None:
+            return dict(self.__dict__, _adjacency=None, _snap_index=None, _paths=OrderedDict(),
+                        _lock=None)
+        return {'store_dir': self.store_dir, 'signature': self.signature}
+
+    def __setstate__(self, state):
+        if 'nodes' in state:
+            self.__dict__.update(state)
+            self._lock = threading.Lock()
+            return
+        network = RoadNetwork._load(state['store_dir'], state['signature'])
+        self.__dict__.update(network.__dict__)
+
+    @classmethod
+    def _load(cls, store_dir, signature):
+        arrays = [
+            np.load(os.path.join(store_dir, name), mmap_mode='r')
+            for name in (NODES_FILE, INDPTR_FILE, TARGETS_FILE, TIMES_FILE, LENGTHS_FILE, REACHABLE_FILE)
+        ]
+        return cls(*arrays, store_dir=store_dir, signature=signature)
+
+    @classmethod
+    def open(cls, store_dir, source_file):
+        """
+        Ouvre le graphe en projection mémoire s'il correspond encore au fichier source
+
+        Returns:
+            RoadNetwork ou None si le graphe est absent ou périmé
+        """
+        try:
+            with open(os.path.join(store_dir, META_FILE), 'r') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if meta != source_signature(source_file):
+            return None
+        return cls._load(store_dir, meta)
+
+    @classmethod
+    def build(cls, store_dir, source_file):
+        """Construit le graphe depuis les voies du GeoJSON et l'enregistre dans store_dir"""
+        coords = []
+        way_ids = []
+        speeds = []
+        directions = []
+        for way_id, (line, speed, direction) in enumerate(iter_highway_ways(source_file)):
+            coords.extend(line)
+            way_ids.extend([way_id] * len(line))
+            speeds.append(speed)
+            directions.append(direction)
+
+        if not coords:
+            raise ValueError(f"Aucune voie carrossable dans {source_file}")
+
+        coords = np.asarray(coords, dtype=np.float64)[:, :2]
+        way_ids = np.asarray(way_ids, dtype=np.int64)
+        speeds = np.asarray(speeds, dtype=np.float64)
+        directions = np.asarray(directions, dtype=np.int8)
+
+        # Nœuds OSM identifiés par leurs coordonnées arrondies à 1e-7 degré
+        keys = np.round(coords * 1e7).astype(np.int64)
+        _, node_of, occurrences = np.unique(
+            keys, axis=0, return_inverse=True, return_counts=True)
+        node_of = node_of.ravel()
+
+        # Segments consécutifs d'une même voie
+        same_way = way_ids[1:] == way_ids[:-1]
+        segment_lengths = np.where(same_way, _haversine_m(
+            coords[:-1, 1], coords[:-1, 0], coords[1:, 1], coords[1:, 0]), 0)
+        segment_times = segment_lengths / (speeds[way_ids[:-1]] / 3.6)
+        cumulative_lengths = np.concatenate(([0], np.cumsum(segment_lengths)))
+        cumulative_times = np.concatenate(([0], np.cumsum(segment_times)))
+
+        # Positions conservées : extrémités des voies et nœuds partagés
+        kept = occurrences[node_of] > 1
+        kept[0] = kept[-1] = True
+        kept[1:][~same_way] = True
+        kept[:-1][~same_way] = True
+        positions = np.flatnonzero(kept)
+
+        starts, ends = positions[:-1], positions[1:]
+        in_way = way_ids[starts] == way_ids[ends]
+        starts, ends = starts[in_way], ends[in_way]
+        arc_ways = way_ids[starts]
+        arc_lengths = cumulative_lengths[ends] - cumulative_lengths[starts]
+        arc_times = cumulative_times[ends] - cumulative_times[starts]
+
+        kept_nodes, graph_node_of = np.unique(node_of[positions], return_inverse=True)
+        graph_node_at = np.full(len(coords), -1, dtype=np.int64)
+        graph_node_at[positions] = graph_node_of.ravel()
+        sources, targets = graph_node_at[starts], graph_node_at[ends]
+
+        forward = directions[arc_ways] >= 0
+        backward = directions[arc_ways] <= 0
+        arc_sources = np.concatenate((sources[forward], targets[backward]))
+        arc_targets = np.concatenate((targets[forward], sources[backward]))
+        arc_times = np.concatenate((arc_times[forward], arc_times[backward]))
+        arc_lengths = np.concatenate((arc_lengths[forward], arc_lengths[backward]))
+
+        num_nodes = len(kept_nodes)
+        order = np.argsort(arc_sources, kind='stable')
+        indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(np.bincount(arc_sources, minlength=num_nodes))
+
+        nodes = np.empty((num_nodes, 2), dtype=np.float64)
+        nodes[graph_node_at[positions]] = coords[positions][:, ::-1]
+
+        network = cls(
+            nodes,
+            indptr,
+            arc_targets[order].astype(np.int32),
+            arc_times[order].astype(np.float32),
+            arc_lengths[order].astype(np.float32),
+            np.zeros(num_nodes, dtype=bool)
+        )
+        network.reachable = network._largest_component()
+
+        os.makedirs(store_dir, exist_ok=True)
+        for name, array in [
+            (NODES_FILE, network.nodes), (INDPTR_FILE, network.indptr),
+            (TARGETS_FILE, network.targets), (TIMES_FILE, network.times),
+            (LENGTHS_FILE, network.lengths), (REACHABLE_FILE, network.reachable)
+        ]:
+            _save_npy(os.path.join(store_dir, name), array)
+
+        # Les métadonnées sont écrites en dernier : elles valident le graphe
+        meta = source_signature(source_file)
+        with open(os.path.join(store_dir, META_FILE), 'w') as f:
+            json.dump(meta, f)
+
+        return cls._load(store_dir, meta)
+
+    @classmethod
+    def load(cls, store_dir, source_file):
+        """Ouvre le graphe enregistré, reconstruit si le fichier source a changé"""
+        network = cls.open(store_dir, source_file)
+        if network is None:
+            network = cls.build(store_dir, source_file)
+        return network
+
+    def _adjacency_lists(self):
+        """Listes d'arcs (cible, temps, longueur) par nœud, construites au premier Dijkstra"""
+        if self._adjacency is None:
+            indptr = self.indptr.tolist()
+            arcs = list(zip(self.targets.tolist(), self.times.tolist(), self.lengths.tolist()))
+            self._adjacency = [arcs[indptr[node]:indptr[node + 1]] for node in range(len(indptr) - 1)]
+        return self._adjacency
+
+    def _largest_component(self):
+        """Plus grande composante connexe du graphe non orienté"""
+        num_nodes = len(self.nodes)
+        sources = np.repeat(np.arange(num_nodes), np.diff(self.indptr))
+        neighbors = [[] for _ in range(num_nodes)]
+        for a, b in zip(sources.tolist(), self.targets.tolist()):
+            neighbors[a].append(b)
+            neighbors[b].append(a)
+
+        component = np.full(num_nodes, -1, dtype=np.int64)
+        sizes = []
+        for root in range(num_nodes):
+            if component[root] >= 0:
+                continue
+            label = len(sizes)
+            component[root] = label
+            stack = [root]
+            size = 0
+            while stack:
+                node = stack.pop()
+                size += 1
+                for neighbor in neighbors[node]:
+                    if component[neighbor] < 0:
+                        component[neighbor] = label
+                        stack.append(neighbor)
+            sizes.append(size)
+        return component == int(np.argmax(sizes))
+
+    def _reachable_index(self):
+        """Index spatial des nœuds atteignables (l'identifiant d'entrée est le nœud), construit au premier accrochage"""
+        if self._snap_index is None:
+            index = SpatialIndex()
+            nodes = np.asarray(self.nodes)
+            for node in np.flatnonzero(self.reachable).tolist():
+                index.insert(float(nodes[node, 0]), float(nodes[node, 1]), node)
+            self._snap_index = index
+        return self._snap_index
+
+    def snap(self, locations):
+        """
+        Accroche chaque coordonnée (lat, lon) au nœud atteignable le plus proche
+
+        Returns:
+            tuple: (nœuds, distances d'accès en mètres)
+        """
+        locations = np.asarray(locations, dtype=np.float64).reshape(-1, 2)
+        index = self._reachable_index()
+
+        snapped = np.empty(len(locations), dtype=np.int64)
+        for i, location in enumerate(locations):
+            entry_id, _ = index.query_nearest(location, 1)[0]
+            snapped[i] = index.items[entry_id]
+
+        node_coords = np.asarray(self.nodes)[snapped]
+        access = _haversine_m(locations[:, 0], locations[:, 1], node_coords[:, 0], node_coords[:, 1])
+        return snapped, access
+
+    def shortest_paths(self, source, targets):
+        """
+        Dijkstra sur les temps de trajet depuis source, arrêté dès que tous les nœuds cibles sont fixés
+
+        Returns:
+            dict: nœud cible -> (temps en secondes, longueur en mètres) ; cibles inaccessibles absentes
+        """
+        adjacency = self._adjacency_lists()
+        remaining = set(targets)
+        settled = {}
+        best = [float('inf')] * len(adjacency)
+        best[source] = 0.0
+        heap = [(0.0, 0.0, source)]
+        heappush, heappop = heapq.heappush, heapq.heappop
+        while heap and remaining:
+            time, length, node = heappop(heap)
+            if node in settled:
+                continue
+            settled[node] = (time, length)
+            remaining.discard(node)
+            for target, arc_time, arc_length in adjacency[node]:
+                candidate = time + arc_time
+                if candidate < best[target]:
+                    best[target] = candidate
+                    heappush(heap, (candidate, length + arc_length, target))
+        return {target: settled[target] for target in targets if target in settled}
+
+    def travel_matrices(self, locations):
+        """
+        Calcule les matrices de distances routières (m) et de temps de trajet (s) entre les coordonnées
+
+        Un Dijkstra est lancé depuis chaque nœud distinct auquel les points sont
+        accrochés ; les plus courts chemins déjà calculés entre nœuds sont conservés
+        en mémoire (MAX_PATH_SOURCES sources au plus) et réutilisés par les appels suivants. Les trajets d'accès
+        point - nœud sont ajoutés à vitesse réduite ; les paires sans chemin
+        reprennent la distance à vol d'oiseau majorée.
+
+        Returns:
+            tuple: (distances, temps), matrices n x n d'entiers
+        """
+        locations = np.asarray(locations, dtype=np.float64).reshape(-1, 2)
+        snapped, access = self.snap(locations)
+        unique_nodes = sorted(set(snapped.tolist()))
+
+        position = {node: k for k, node in enumerate(unique_nodes)}
+        node_times = np.full((len(unique_nodes), len(unique_nodes)), np.nan)
+        node_lengths = np.full_like(node_times, np.nan)
+        for source in unique_nodes:
+            with self._lock:
+                paths, searched = self._paths.pop(source, None) or ({}, set())
+                missing = [target for target in unique_nodes if target not in searched]
+            if missing:
+                found = self.shortest_paths(source, missing)
+            with self._lock:
+                if missing:
+                    paths.update(found)
+                    searched.update(missing)
+                self._paths[source] = (paths, searched)
+                while len(self._paths) > MAX_PATH_SOURCES:
+                    self._paths.popitem(last=False)
+                row = [(target, paths[target]) for target in unique_nodes if target in paths]
+            for target, (time, length) in row:
+                node_times[position[source], position[target]] = time
+                node_lengths[position[source], position[target]] = length
+
+        rows = np.array([position[node] for node in snapped.tolist()])
+        road_times = node_times[rows[:, None], rows[None, :]]
+        road_lengths = node_lengths[rows[:, None], rows[None, :]]
+        access_times = access / (ACCESS_SPEED_KMH / 3.6)
+
+        lat, lon = locations[:, 0], locations[:, 1]
+        fallback = _haversine_m(lat[:, None], lon[:, None], lat[None, :], lon[None, :]) * DETOUR_FACTOR
+        routed = ~np.isnan(road_times)
+        distances = np.where(
+            routed, access[:, None] + road_lengths + access[None, :], fallback)
+        times = np.where(
+            routed, access_times[:, None] + road_times + access_times[None, :],
+            fallback / (FALLBACK_SPEED_KMH / 3.6))
+
+        np.fill_diagonal(distances, 0)
+        np.fill_diagonal(times, 0)
+        return distances.astype(np.int64), np.ceil(times).astype(np.int64)
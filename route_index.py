@@ -0,0 +1,111 @@
+"""
+Index en mémoire des itinéraires de la solution courante, par chauffeur
+"""
+import csv
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Conversion des colonnes numériques à la relecture de l'export CSV
+EXPORT_COLUMN_TYPES = {
+    'driver_id': int,
+    'stop_number': int,
+    'point_id': int,
+    'lat': float,
+    'lon': float,
+    'passengers': int,
+    'distance_to_chateau': float,
+}
+
+
+class RouteIndex:
+    """
+    Arrêts ordonnés de chaque chauffeur pour la dernière solution publiée.
+
+    publish() construit un nouvel index puis le substitue à l'ancien en une
+    seule affectation : les lecteurs voient toujours une solution complète,
+    sans verrou. Si export_file est renseigné, la solution est exportée en CSV
+    par un thread d'arrière-plan, hors du chemin des requêtes ; seul l'export
+    de la dernière solution publiée est écrit.
+    """
+
+    def __init__(self, export_file=None):
+        self.export_file = export_file
+        self._state = (None, {})
+        self._version = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1) if export_file else None
+
+    @property
+    def solution_id(self):
+        """Identifiant de la solution courante (None si inconnue)"""
+        return self._state[0]
+
+    @staticmethod
+    def _build(routes_details):
+        routes = {}
+        for stop in routes_details:
+            routes.setdefault(int(stop['driver_id']), []).append(stop)
+        return {
+            driver_id: tuple(sorted(stops, key=lambda stop: int(stop['stop_number'])))
+            for driver_id, stops in sorted(routes.items())
+        }
+
+    def publish(self, solution_id, routes_details):
+        """Remplace la solution courante (lignes routes_details de RouteVisualizer.extract_routes)"""
+        routes = self._build(routes_details)
+        with self._lock:
+            self._version += 1
+            version = self._version
+            self._state = (solution_id, routes)
+        if self._executor is not None:
+            self._executor.submit(self._export, version, routes)
+
+    def _export(self, version, routes):
+        if version != self._version:
+            return
+        rows = [stop for stops in routes.values() for stop in stops]
+        tmp_path = f"{self.export_file}.tmp"
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            if rows:
+                writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+                writer.writeheader()
+                writer.writerows(rows)
+        os.replace(tmp_path, self.export_file)
+
+    def load_export(self):
+        """Recharge la dernière solution exportée si aucune n'a été publiée depuis le démarrage"""
+        if not self.export_file or not os.path.exists(self.export_file):
+            return False
+        with open(self.export_file, 'r', newline='', encoding='utf-8') as f:
+            rows = [
+                {
+                    key: EXPORT_COLUMN_TYPES[key](value) if key in EXPORT_COLUMN_TYPES and value != '' else value
+                    for key, value in row.items()
+                }
+                for row in csv.DictReader(f)
+            ]
+        routes = self._build(rows)
+        with self._lock:
+            if self._version:
+                return False
+            self._state = (None, routes)
+        return True
+
+    def get(self, driver_id):
+        """Retourne les arrêts ordonnés d'un chauffeur, ou None"""
+        stops = self._state[1].get(driver_id)
+        return list(stops) if stops else None
+
+    def drivers(self):
+        """Retourne les identifiants des chauffeurs de la solution courante"""
+        return list(self._state[1])
+
+    def routes_details(self):
+        """Retourne tous les arrêts de la solution courante, par chauffeur puis par ordre de passage"""
+        return [stop for stops in self._state[1].values() for stop in stops]
+
+    def flush(self):
+        """Attend la fin de l'export en cours"""
+        if self._executor is not None:
+            self._executor.submit(lambda: None).result()
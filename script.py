@@ -1,12 +1,14 @@
 import folium
 import numpy as np
 import pandas as pd
-import json
 from ortools.constraint_solver import routing_enums_pb2
 from ortools.constraint_solver import pywrapcp
 from math import radians, cos, sin, asin, sqrt
-import random
 from folium import plugins
+from distance_matrix import haversine_matrix
+from osm_source import load_osm_data
+from convergence import ConvergencePolicy
+from visualizer import CompactRouteLayer
 
 CHATEAU_COORDS = (48.45038746219548, -2.0447748346342434)
 MAX_DISTANCE_KM = 15
@@ -14,6 +16,8 @@ NUM_DRIVERS = 3
 CAPACITY_PER_DRIVER = 8
 ARRIVAL_WINDOW = ("8:00", "12:00")
 DEPARTURE_WINDOW = ("14:00", "16:00")
+COMPACT_MAP = True
+ROUTE_COLORS = ['green', 'purple', 'orange', 'cadetblue', 'darkred', 'black', 'pink']
 
 def haversine(lon1, lat1, lon2, lat2):
     """
@@ -29,73 +33,6 @@ def haversine(lon1, lat1, lon2, lat2):
     r = 6371 
     return c * r
 
-def load_osm_data(geojson_file, chateau_coords, max_distance_km):
-    """
-    Charge les données OSM et filtre les points dans le rayon maximum
-    """
-    with open(geojson_file, 'r') as f:
-        data = json.load(f)
-    
-    points = []
-    point_id = 0
-    
-    for feature in data['features']:
-        coords = None
-        
-        if feature['geometry']['type'] == 'Point':
-            coords = (feature['geometry']['coordinates'][1], feature['geometry']['coordinates'][0])
-        elif feature['geometry']['type'] == 'Polygon' and len(feature['geometry']['coordinates'][0]) > 0:
-            coords = (feature['geometry']['coordinates'][0][0][1], feature['geometry']['coordinates'][0][0][0])
-        elif feature['geometry']['type'] == 'MultiPolygon' and len(feature['geometry']['coordinates']) > 0 and len(feature['geometry']['coordinates'][0]) > 0:
-            coords = (feature['geometry']['coordinates'][0][0][0][1], feature['geometry']['coordinates'][0][0][0][0])
-        
-        if coords:
-            distance = haversine(chateau_coords[1], chateau_coords[0], coords[1], coords[0])
-            
-            if distance <= max_distance_km:
-                poi_type = None
-                if 'highway' in feature['properties']:
-                    poi_type = feature['properties']['highway']
-                elif 'amenity' in feature['properties']:
-                    poi_type = feature['properties']['amenity']
-                else:
-                    for key in ['name', 'building', 'shop', 'leisure', 'tourism']:
-                        if key in feature['properties']:
-                            poi_type = f"{key}:{feature['properties'][key]}"
-                            break
-                    
-                    if not poi_type:
-                        poi_type = feature['geometry']['type']
-                
-              
-                passengers = random.randint(1, 3)
-                
-                arrival_hour = random.randint(8, 11)
-                arrival_minute = random.randint(0, 59)
-                if arrival_hour == 11 and arrival_minute > 30:
-                    arrival_minute = 30  
-                arrival_time = f"{arrival_hour:02d}:{arrival_minute:02d}"
-                
-                name = feature['properties'].get('name', f"Point {point_id}")
-                
-                points.append({
-                    'id': point_id,
-                    'lat': coords[0],
-                    'lon': coords[1],
-                    'passengers': passengers,
-                    'distance_to_chateau': distance,
-                    'poi_type': poi_type,
-                    'arrival_time': arrival_time,
-                    'name': name
-                })
-                
-                point_id += 1
-    
-    if len(points) > 30:
-        random.shuffle(points)
-        points = points[:30]
-    
-    return points
 
 def create_map(chateau_coords, points_data):
     """
@@ -119,6 +56,10 @@ def create_map(chateau_coords, points_data):
         popup=f"Zone de {MAX_DISTANCE_KM} km"
     ).add_to(map_viz)
     
+    if COMPACT_MAP:
+        CompactRouteLayer(points_data, None, ROUTE_COLORS).add_to(map_viz)
+        return map_viz
+    
     for point in points_data:
         popup_content = (f"ID: {point['id']}<br>"
                         f"Nom: {point['name']}<br>"
@@ -140,16 +81,7 @@ def prepare_vrp_data(chateau_coords, points):
     Prépare les données au format requis pour OR-Tools
     """
     locations = [chateau_coords] + [(p['lat'], p['lon']) for p in points]
-    num_locations = len(locations)
-    distance_matrix = np.zeros((num_locations, num_locations))
-    
-    for i in range(num_locations):
-        for j in range(num_locations):
-            if i != j:
-                distance_matrix[i][j] = haversine(
-                    locations[i][1], locations[i][0],
-                    locations[j][1], locations[j][0]
-                ) * 1000
+    distance_matrix = haversine_matrix(locations)
     
     demands = [0]
     for p in points:
@@ -176,19 +108,12 @@ def solve_vrp(data):
     )
     routing = pywrapcp.RoutingModel(manager)
     
-    def distance_callback(from_index, to_index):
-        from_node = manager.IndexToNode(from_index)
-        to_node = manager.IndexToNode(to_index)
-        return int(data['distance_matrix'][from_node][to_node])
-
-    transit_callback_index = routing.RegisterTransitCallback(distance_callback)
+    transit_callback_index = routing.RegisterTransitMatrix(
+        np.asarray(data['distance_matrix'], dtype=np.int64).tolist())
     routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
     
-    def demand_callback(from_index):
-        from_node = manager.IndexToNode(from_index)
-        return data['demands'][from_node]
-    
-    demand_callback_index = routing.RegisterUnaryTransitCallback(demand_callback)
+    demand_callback_index = routing.RegisterUnaryTransitVector(
+        [int(demand) for demand in data['demands']])
     
     vehicle_capacities = [cap * 3 for cap in data['vehicle_capacities']]
     
@@ -221,15 +146,21 @@ def solve_vrp(data):
     
     search_parameters.time_limit.seconds = 120
     
+    monitor = ConvergencePolicy().monitor(search_parameters.time_limit.seconds)
+    monitor.attach(routing)
+    
     solution = routing.SolveWithParameters(search_parameters)
     
     if not solution:
+        # Sans solution, le moniteur n'a pas déclenché d'arrêt : il reste valable pour la relance
         print("Pas de solution, tentative avec AUTOMATIC...")
         search_parameters.first_solution_strategy = (
             routing_enums_pb2.FirstSolutionStrategy.AUTOMATIC
         )
         solution = routing.SolveWithParameters(search_parameters)
     
+    print(f"Recherche arrêtée : {monitor.finish()['stop_reason']}")
+    
     return manager, routing, solution
 
 def display_routes(manager, routing, solution, points, map_viz):
@@ -240,9 +171,10 @@ def display_routes(manager, routing, solution, points, map_viz):
         print("Pas de solution trouvée !")
         return
     
-    colors = ['green', 'purple', 'orange', 'cadetblue', 'darkred', 'black', 'pink']
+    colors = ROUTE_COLORS
     
     routes_df = []
+    compact_routes = []
     
     print(f"Solution trouvée !")
     total_distance = 0
@@ -305,7 +237,14 @@ def display_routes(manager, routing, solution, points, map_viz):
         
         print(f"Chauffeur {vehicle_id}: {len(route_points)} points, charge: {route_load}/{CAPACITY_PER_DRIVER}")
         
-        if len(route_points) > 2:
+        if COMPACT_MAP:
+            compact_routes.append({
+                'points': route_points,
+                'stops': stop_sequence,
+                'distance': route_distance,
+                'load': route_load
+            })
+        elif len(route_points) > 2:
             print(f"Tracé de l'itinéraire pour le chauffeur {vehicle_id} avec {len(route_points)} points")
             
             print(f"Premier point: {route_points[0]}, Deuxième point: {route_points[1]}")
@@ -363,34 +302,39 @@ def display_routes(manager, routing, solution, points, map_viz):
                 icon=folium.Icon(color=colors[vehicle_id % len(colors)], icon='car', prefix='fa')
             ).add_to(map_viz)
     
+    if COMPACT_MAP:
+        CompactRouteLayer([], compact_routes, colors).add_to(map_viz)
+    
     print(f"Distance totale: {total_distance:.2f} km")
     return pd.DataFrame(routes_df) if routes_df else None
-print("Chargement des données OSM...")
-geojson_file = 'dinan_osm_data.geojson'
-points = load_osm_data(geojson_file, CHATEAU_COORDS, MAX_DISTANCE_KM)
-print(f"{len(points)} points trouvés dans le rayon de {MAX_DISTANCE_KM} km.")
 
-if len(points) == 0:
-    print("Aucun point trouvé dans le rayon. Vérifiez les données OSM ou augmentez le rayon.")
-    exit()
+if __name__ == "__main__":
+    print("Chargement des données OSM...")
+    geojson_file = 'dinan_osm_data.geojson'
+    points = load_osm_data(geojson_file, CHATEAU_COORDS, MAX_DISTANCE_KM)
+    print(f"{len(points)} points trouvés dans le rayon de {MAX_DISTANCE_KM} km.")
+
+    if len(points) == 0:
+        print("Aucun point trouvé dans le rayon. Vérifiez les données OSM ou augmentez le rayon.")
+        exit()
 
-print("Création de la carte...")
-map_viz = create_map(CHATEAU_COORDS, points)
+    print("Création de la carte...")
+    map_viz = create_map(CHATEAU_COORDS, points)
 
-print("Préparation des données pour l'optimisation...")
-data = prepare_vrp_data(CHATEAU_COORDS, points)
+    print("Préparation des données pour l'optimisation...")
+    data = prepare_vrp_data(CHATEAU_COORDS, points)
 
-print("Résolution du problème de routage...")
-manager, routing, solution = solve_vrp(data)
+    print("Résolution du problème de routage...")
+    manager, routing, solution = solve_vrp(data)
 
-if solution:
-    print("Tracé des itinéraires optimisés...")
-    routes_df = display_routes(manager, routing, solution, points, map_viz)
-    if routes_df is not None:
-        routes_df.to_csv("routes_optimisees.csv", index=False)
-        print("Données des routes sauvegardées dans 'routes_optimisees.csv'")
-else:
-    print("Pas de solution trouvée. Vérifiez les contraintes du problème.")
+    if solution:
+        print("Tracé des itinéraires optimisés...")
+        routes_df = display_routes(manager, routing, solution, points, map_viz)
+        if routes_df is not None:
+            routes_df.to_csv("routes_optimisees.csv", index=False)
+            print("Données des routes sauvegardées dans 'routes_optimisees.csv'")
+    else:
+        print("Pas de solution trouvée. Vérifiez les contraintes du problème.")
 
-map_viz.save("index.html")
-print(f"Carte générée avec les itinéraires optimisés dans 'index.html'")
\ No newline at end of file
+    map_viz.save("index.html")
+    print(f"Carte générée avec les itinéraires optimisés dans 'index.html'")
@@ -0,0 +1,120 @@
+"""
+Cache LRU des solutions d'optimisation, avec persistance optionnelle sur disque
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+class SolutionCache:
+    """
+    Cache LRU des solutions, indexé par l'empreinte du problème.
+
+    Si cache_dir est renseigné, chaque entrée est aussi écrite dans
+    <cache_dir>/<empreinte>.json et rechargée au démarrage, les entrées
+    évincées étant supprimées du disque. on_evict(empreinte), s'il est
+    renseigné, est appelé pour chaque entrée évincée ou invalidée.
+    """
+
+    def __init__(self, max_entries=32, cache_dir=None, on_evict=None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.on_evict = on_evict
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._load_from_disk()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load_from_disk(self):
+        files = [
+            os.path.join(self.cache_dir, name)
+            for name in os.listdir(self.cache_dir) if name.endswith('.json')
+        ]
+        files.sort(key=os.path.getmtime)
+
+        for path in files:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    value = json.load(f)
+            except (OSError, ValueError):
+                continue
+            key = os.path.basename(path)[:-len('.json')]
+            self._entries[key] = value
+            self._evict()
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            key, _ = self._entries.popitem(last=False)
+            self.evictions += 1
+            if self.cache_dir:
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+            if self.on_evict:
+                self.on_evict(key)
+
+    def get(self, key):
+        """Retourne la solution associée à l'empreinte, ou None"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        """Enregistre une solution (doit être sérialisable en JSON si persistée)"""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+
+            if self.cache_dir:
+                tmp_path = f"{self._path(key)}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(value, f, ensure_ascii=False)
+                os.replace(tmp_path, self._path(key))
+
+            self._evict()
+
+    def invalidate(self, key=None):
+        """Supprime une entrée, ou tout le cache si key est None"""
+        with self._lock:
+            keys = list(self._entries) if key is None else [key]
+            for k in keys:
+                if self._entries.pop(k, None) is None:
+                    continue
+                if self.cache_dir:
+                    try:
+                        os.remove(self._path(k))
+                    except OSError:
+                        pass
+                if self.on_evict:
+                    self.on_evict(k)
+
+    def keys(self):
+        """Retourne les empreintes présentes dans le cache"""
+        with self._lock:
+            return list(self._entries)
+
+    def stats(self):
+        """Retourne les compteurs du cache"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'persistent': bool(self.cache_dir)
+            }
@@ -0,0 +1,116 @@
+"""
+Graphe creux des k plus proches voisins pour les grandes instances
+"""
+import numpy as np
+from distance_matrix import haversine_from
+from spatial_index import SpatialIndex
+
+
+class SparseDistanceGraph:
+    """
+    Distances entre nœuds stockées au format CSR (indptr, indices, distances en mètres).
+
+    Les voisins de chaque ligne sont triés par numéro de nœud. Chaque nœud ne conserve que ses k plus proches voisins et le dépôt (nœud 0),
+    qui est lui-même relié à tous les nœuds. La mémoire croît donc linéairement
+    avec le nombre de points. distance() retourne la distance réelle d'un arc ;
+    cost() la multiplie par non_neighbor_penalty si l'arc est hors du graphe,
+    pour détourner la recherche de ces arcs.
+
+    S'utilise comme une matrice de distances : graph[i][j] et len(graph).
+    """
+
+    def __init__(self, locations, indptr, indices, distances, non_neighbor_penalty=10):
+        self.locations = np.asarray(locations, dtype=np.float64).reshape(-1, 2)
+        self.indptr = indptr
+        self.indices = indices
+        self.distances = distances
+        self.non_neighbor_penalty = non_neighbor_penalty
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def __getitem__(self, from_node):
+        return _GraphRow(self, from_node)
+
+    def _haversine(self, from_node, to_node):
+        return haversine_from(
+            self.locations[from_node], self.locations[to_node:to_node + 1])[0] * 1000
+
+    def _arc(self, from_node, to_node):
+        """Distance de l'arc s'il est dans le graphe, sinon None (recherche dichotomique dans la ligne triée)"""
+        start, end = self.indptr[from_node], self.indptr[from_node + 1]
+        position = start + np.searchsorted(self.indices[start:end], to_node)
+        if position < end and self.indices[position] == to_node:
+            return int(self.distances[position])
+        return None
+
+    def distance(self, from_node, to_node):
+        """Distance réelle de l'arc en mètres"""
+        if from_node == to_node:
+            return 0
+        distance = self._arc(from_node, to_node)
+        if distance is None:
+            distance = int(self._haversine(from_node, to_node))
+        return distance
+
+    def cost(self, from_node, to_node):
+        """Coût de l'arc : sa distance, multipliée par non_neighbor_penalty s'il est hors du graphe"""
+        if from_node == to_node:
+            return 0
+        distance = self._arc(from_node, to_node)
+        if distance is None:
+            distance = int(self._haversine(from_node, to_node) * self.non_neighbor_penalty)
+        return distance
+
+    def nbytes(self):
+        """Taille des tableaux CSR en octets"""
+        return self.indptr.nbytes + self.indices.nbytes + self.distances.nbytes
+
+
+class _GraphRow:
+    def __init__(self, graph, from_node):
+        self.graph = graph
+        self.from_node = from_node
+
+    def __getitem__(self, to_node):
+        return self.graph.distance(self.from_node, to_node)
+
+
+def knn_graph(locations, k=20, non_neighbor_penalty=10):
+    """
+    Construit le graphe des k plus proches voisins de chaque point (le premier point est le dépôt)
+
+    Args:
+        locations: Séquence de coordonnées (lat, lon), dépôt en premier
+        k: Nombre de voisins conservés par point
+        non_neighbor_penalty: Facteur appliqué aux arcs hors du graphe
+
+    Returns:
+        SparseDistanceGraph
+    """
+    locations = np.asarray(locations, dtype=np.float64).reshape(-1, 2)
+    num_locations = len(locations)
+
+    index = SpatialIndex()
+    for lat, lon in locations[1:].tolist():
+        index.insert(lat, lon)
+
+    depot_distances = haversine_from(locations[0], locations) * 1000
+    rows = [(np.arange(1, num_locations), depot_distances[1:])]
+    for node in range(1, num_locations):
+        neighbors = [
+            (entry_id + 1, distance)
+            for entry_id, distance in index.query_nearest(locations[node], k + 1)
+            if entry_id + 1 != node
+        ][:k]
+        neighbor_nodes = np.array([0] + [n for n, _ in neighbors], dtype=np.int64)
+        neighbor_distances = np.array(
+            [depot_distances[node]] + [d * 1000 for _, d in neighbors], dtype=np.float64)
+        order = np.argsort(neighbor_nodes)
+        rows.append((neighbor_nodes[order], neighbor_distances[order]))
+
+    indptr = np.zeros(num_locations + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(nodes) for nodes, _ in rows])
+    indices = np.concatenate([nodes for nodes, _ in rows]).astype(np.int32)
+    distances = np.concatenate([dists for _, dists in rows]).astype(np.int32)
+    return SparseDistanceGraph(locations, indptr, indices, distances, non_neighbor_penalty)
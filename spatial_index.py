@@ -0,0 +1,137 @@
+"""
+Index spatial en grille pour les requêtes par rayon et par emprise
+"""
+import math
+from collections import defaultdict
+import numpy as np
+from distance_matrix import EARTH_RADIUS_KM, haversine_from
+
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+
+
+class SpatialIndex:
+    """
+    Index spatial en grille régulière (cellules de cell_size_deg degrés).
+
+    Chaque entrée est un couple de coordonnées (lat, lon) associé à un objet
+    quelconque. Les requêtes ne parcourent que les cellules couvertes par
+    l'emprise demandée au lieu de l'ensemble des entrées.
+    """
+
+    def __init__(self, cell_size_deg=0.01):
+        self.cell_size_deg = cell_size_deg
+        self.cells = defaultdict(list)
+        self.items = []
+        self._lats = []
+        self._lons = []
+        self._coords = None
+
+    @classmethod
+    def from_points(cls, points, cell_size_deg=0.01):
+        """Construit un index à partir d'une liste de points {'lat', 'lon', ...}"""
+        index = cls(cell_size_deg)
+        for point in points:
+            index.insert(point['lat'], point['lon'], point)
+        return index
+
+    def __len__(self):
+        return len(self.items)
+
+    def _cell(self, lat, lon):
+        return (int(math.floor(lat / self.cell_size_deg)),
+                int(math.floor(lon / self.cell_size_deg)))
+
+    def insert(self, lat, lon, item=None):
+        """Ajoute une entrée et retourne son identifiant"""
+        entry_id = len(self.items)
+        self.items.append(item)
+        self._lats.append(lat)
+        self._lons.append(lon)
+        self.cells[self._cell(lat, lon)].append(entry_id)
+        self._coords = None
+        return entry_id
+
+    def coords(self):
+        """Retourne les coordonnées de toutes les entrées sous forme de tableau (n, 2)"""
+        if self._coords is None:
+            self._coords = np.column_stack((
+                np.asarray(self._lats, dtype=np.float64),
+                np.asarray(self._lons, dtype=np.float64)
+            )).reshape(-1, 2)
+        return self._coords
+
+    def _candidates(self, min_lat, min_lon, max_lat, max_lon):
+        min_cell = self._cell(min_lat, min_lon)
+        max_cell = self._cell(max_lat, max_lon)
+        num_cells = (max_cell[0] - min_cell[0] + 1) * (max_cell[1] - min_cell[1] + 1)
+
+        candidates = []
+        if num_cells > len(self.cells):
+            for (row, col), ids in self.cells.items():
+                if min_cell[0] <= row <= max_cell[0] and min_cell[1] <= col <= max_cell[1]:
+                    candidates.extend(ids)
+        else:
+            for row in range(min_cell[0], max_cell[0] + 1):
+                for col in range(min_cell[1], max_cell[1] + 1):
+                    candidates.extend(self.cells.get((row, col), ()))
+
+        return np.sort(np.asarray(candidates, dtype=np.int64))
+
+    def query_bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """Retourne les identifiants (triés) des entrées contenues dans l'emprise"""
+        candidates = self._candidates(min_lat, min_lon, max_lat, max_lon)
+        if not len(candidates):
+            return []
+
+        coords = self.coords()[candidates]
+        mask = (
+            (coords[:, 0] >= min_lat) & (coords[:, 0] <= max_lat) &
+            (coords[:, 1] >= min_lon) & (coords[:, 1] <= max_lon)
+        )
+        return candidates[mask].tolist()
+
+    def query_radius(self, center, radius_km):
+        """
+        Retourne les entrées situées à moins de radius_km du centre (lat, lon)
+
+        Returns:
+            list: Couples (identifiant, distance en km), triés par identifiant
+        """
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        cos_lat = max(math.cos(math.radians(min(abs(center[0]) + dlat, 90))), 1e-6)
+        dlon = min(radius_km / (KM_PER_DEGREE_LAT * cos_lat), 180)
+
+        candidates = self._candidates(
+            center[0] - dlat, center[1] - dlon,
+            center[0] + dlat, center[1] + dlon
+        )
+        if not len(candidates):
+            return []
+
+        distances = haversine_from(center, self.coords()[candidates])
+        mask = distances <= radius_km
+        return list(zip(candidates[mask].tolist(), distances[mask].tolist()))
+
+    def query_nearest(self, center, k):
+        """
+        Retourne les k entrées les plus proches du centre (lat, lon)
+
+        Le rayon de recherche double jusqu'à contenir au moins k entrées, ce qui
+        garantit le résultat exact (toute entrée plus proche est dans le rayon).
+
+        Returns:
+            list: Couples (identifiant, distance en km), triés par distance croissante
+        """
+        k = min(k, len(self))
+        if k <= 0:
+            return []
+
+        radius_km = self.cell_size_deg * KM_PER_DEGREE_LAT
+        while True:
+            found = self.query_radius(center, radius_km)
+            if len(found) >= k or len(found) == len(self) or radius_km > 2 * math.pi * EARTH_RADIUS_KM:
+                break
+            radius_km *= 2
+
+        found.sort(key=lambda entry: entry[1])
+        return found[:k]
@@ -0,0 +1,9 @@
+"""
+Configuration des tests : la racine du dépôt est importable (modules à plat)
+"""
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
@@ -0,0 +1,40 @@
+"""
+Tests de la résolution par grappes (échanges aux frontières)
+"""
+import optimizer
+from optimizer import RouteOptimizer
+
+DEPOT = (48.45, -2.04)
+
+
+def make_points():
+    """Deux groupes de 10 points, l'un à l'ouest et l'autre à l'est du dépôt"""
+    points = []
+    for i in range(20):
+        side = -1 if i < 10 else 1
+        points.append({
+            'id': i,
+            'name': f"Point {i}",
+            'lat': DEPOT[0] + 0.002 * (i % 10 - 5),
+            'lon': DEPOT[1] + side * (0.04 + 0.002 * (i % 10)),
+            'passengers': 1,
+            'arrival_time': "08:00"
+        })
+    return points
+
+
+def test_boundary_exchange_repairs_bad_split(monkeypatch):
+    # Découpage volontairement mauvais : chaque grappe mélange l'ouest et l'est
+    def bad_split(depot, points, vehicle_counts, capacity):
+        return [list(range(0, 20, 2)), list(range(1, 20, 2))]
+
+    monkeypatch.setattr(optimizer, 'sweep_partition', bad_split)
+    route_optimizer = RouteOptimizer(DEPOT, num_drivers=4, capacity_per_driver=10)
+    route_optimizer.decomposition_threshold = 10
+    route_optimizer.max_points_per_cluster = 10
+
+    manager, routing, solution, data = route_optimizer.solve(make_points(), time_limit=4)
+
+    assert solution is not None
+    assert data['search']['stop_reason'] == 'decomposition'
+    assert data['search']['exchanges'] >= 1
@@ -0,0 +1,47 @@
+"""
+Tests du pré-contrôle des fenêtres horaires (départ du dépôt à la prise de service)
+"""
+from distance_matrix import haversine_matrix
+from feasibility import prescreen
+from time_windows import point_windows, travel_minutes, unreachable_nodes, DEPOT_LEAD_MINUTES
+
+DEPOT = (48.45, -2.04)
+
+
+def make_points():
+    """Demandes de fin de matinée : un point à 1 km du dépôt, l'autre à 14 km"""
+    return [
+        {'id': 1, 'name': "Proche", 'lat': DEPOT[0] + 0.009, 'lon': DEPOT[1],
+         'passengers': 1, 'arrival_time': "11:30"},
+        {'id': 2, 'name': "Lointain", 'lat': DEPOT[0] + 0.126, 'lon': DEPOT[1],
+         'passengers': 1, 'arrival_time': "11:40"},
+    ]
+
+
+def time_check(points, speed_kmh):
+    locations = [DEPOT] + [(p['lat'], p['lon']) for p in points]
+    time_matrix = travel_minutes(haversine_matrix(locations), speed_kmh)
+    _, hard, _ = point_windows(points, 30)
+    return hard, unreachable_nodes(time_matrix, hard, [0, 2, 2])
+
+
+def test_depot_opens_before_first_arrival():
+    hard, _ = time_check(make_points(), 30)
+    assert hard[0][0] == 11 * 60 + 30 - DEPOT_LEAD_MINUTES
+
+
+def test_far_point_rejected_from_shift_start():
+    # À 5 km/h, 14 km demandent 168 minutes : parti à 10h30, le véhicule arrive après midi
+    _, unreachable = time_check(make_points(), 5)
+    assert unreachable.tolist() == [2]
+
+    diagnostic = prescreen(DEPOT, make_points(), 2, 8, 15, 5, service_minutes=2)
+    assert not diagnostic['feasible']
+    assert diagnostic['issues'][0]['code'] == 'travel_time'
+    assert diagnostic['issues'][0]['points'] == [2]
+
+
+def test_points_reachable_at_normal_speed():
+    _, unreachable = time_check(make_points(), 30)
+    assert len(unreachable) == 0
+    assert prescreen(DEPOT, make_points(), 2, 8, 15, 30, service_minutes=2)['feasible']
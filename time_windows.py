@@ -0,0 +1,143 @@
+"""
+Fenêtres horaires et dimension de temps du modèle OR-Tools (minutes depuis minuit)
+"""
+import random
+import numpy as np
+
+# Créneaux de service : 8h-12h et 14h-16h
+SERVICE_WINDOWS = ((8 * 60, 12 * 60), (14 * 60, 16 * 60))
+HORIZON = 24 * 60
+
+# Paramètres par défaut du modèle, communs à l'API Flask et au backend
+WINDOW_WIDTH = 30
+WINDOW_PENALTY = 100
+SERVICE_MINUTES = 2
+AVERAGE_SPEED_KMH = 30
+# Prise de service des chauffeurs : une heure avant la première heure d'arrivée
+DEPOT_LEAD_MINUTES = 60
+
+
+def parse_time(time_str):
+    """
+    Convertit une heure au format HH:MM en minutes depuis minuit
+
+    Args:
+        time_str: Heure au format HH:MM
+
+    Returns:
+        int: Minutes depuis minuit
+    """
+    hours, minutes = map(int, time_str.split(':'))
+    return hours * 60 + minutes
+
+
+def generate_service_time():
+    """Génère une heure aléatoire au format HH:MM dans l'un des créneaux de service"""
+    start, end = random.choice(SERVICE_WINDOWS)
+    hours, minutes = divmod(random.randint(start, end), 60)
+    return f"{hours:02d}:{minutes:02d}"
+
+
+def service_window(minutes):
+    """Retourne le créneau de service contenant l'heure donnée (en minutes), ou None"""
+    for start, end in SERVICE_WINDOWS:
+        if start <= minutes <= end:
+            return start, end
+    return None
+
+
+def travel_minutes(distance_matrix, speed_kmh):
+    """
+    Convertit une matrice de distances (mètres) en temps de trajet entiers
+    (minutes arrondies à la minute supérieure) à vitesse moyenne constante
+    """
+    meters_per_minute = speed_kmh * 1000 / 60
+    return np.ceil(np.asarray(distance_matrix, dtype=np.float64) / meters_per_minute).astype(np.int64)
+
+
+def depot_departure(arrivals, lead=DEPOT_LEAD_MINUTES):
+    """Heure de départ au plus tôt du dépôt : lead minutes avant la première heure d'arrivée"""
+    arrivals = list(arrivals)
+    if not arrivals:
+        return 0
+    return max(0, min(arrivals) - lead)
+
+
+def point_windows(points, width):
+    """
+    Calcule les fenêtres de chaque nœud (dépôt en tête)
+
+    La fenêtre souhaitée d'un point commence à son heure d'arrivée et dure width
+    minutes ; la fenêtre stricte court de l'heure d'arrivée à la fin de son
+    créneau de service. Le dépôt ouvre à la prise de service (depot_departure)
+    et ferme en fin de journée.
+
+    Returns:
+        tuple: (fenêtres souhaitées, fenêtres strictes, indices des points hors créneau)
+    """
+    preferred = []
+    hard = []
+    outside = []
+    for i, p in enumerate(points):
+        arrival = parse_time(p['arrival_time'])
+        window = service_window(arrival)
+        if window is None:
+            outside.append(i)
+            window = (arrival, arrival)
+        preferred.append((arrival, min(arrival + width, window[1])))
+        hard.append((arrival, window[1]))
+    depot = (depot_departure(start for start, _ in hard), HORIZON)
+    return [depot] + preferred, [depot] + hard, outside
+
+
+def unreachable_nodes(time_matrix, hard_windows, service_times):
+    """
+    Pré-contrôle des fenêtres strictes sur le seul trajet aller-retour au dépôt
+
+    Un nœud est inatteignable si le véhicule, parti du dépôt à son ouverture
+    (prise de service, voir point_windows), arrive après la fin de sa fenêtre,
+    ou ne peut plus rentrer au dépôt avant sa fermeture. Aucune tournée ne peut
+    alors le desservir.
+
+    Returns:
+        np.ndarray: Indices des nœuds inatteignables (dépôt exclu)
+    """
+    time_matrix = np.asarray(time_matrix, dtype=np.int64)
+    windows = np.asarray(hard_windows, dtype=np.int64)
+    service_times = np.asarray(service_times, dtype=np.int64)
+
+    depot_open, depot_close = windows[0]
+    arrival = np.maximum(depot_open + time_matrix[0, 1:], windows[1:, 0])
+    back = arrival + service_times[1:] + time_matrix[1:, 0]
+    late = (arrival > windows[1:, 1]) | (back > depot_close)
+    return np.flatnonzero(late) + 1
+
+
+def add_time_dimension(routing, manager, transit_callback_index, preferred_windows, hard_windows,
+                       penalty):
+    """
+    Ajoute la dimension 'Time' au modèle
+
+    transit_callback_index doit inclure le temps de service au nœud de départ.
+    L'attente est autorisée sans limite ; chaque nœud doit être desservi dans sa
+    fenêtre stricte et chaque minute de retard sur la fenêtre souhaitée coûte
+    penalty dans l'objectif.
+    """
+    routing.AddDimension(transit_callback_index, HORIZON, HORIZON, False, 'Time')
+    time_dimension = routing.GetDimensionOrDie('Time')
+
+    for node in range(1, len(hard_windows)):
+        index = manager.NodeToIndex(node)
+        time_dimension.CumulVar(index).SetRange(*hard_windows[node])
+        if preferred_windows[node][1] < hard_windows[node][1]:
+            time_dimension.SetCumulVarSoftUpperBound(index, preferred_windows[node][1], penalty)
+
+    # Départ du dépôt au plus tard et retour au plus tôt : pas d'attente superflue
+    depot_open, depot_close = hard_windows[0]
+    for vehicle_id in range(routing.vehicles()):
+        start, end = routing.Start(vehicle_id), routing.End(vehicle_id)
+        time_dimension.CumulVar(start).SetRange(depot_open, depot_close)
+        time_dimension.CumulVar(end).SetRange(depot_open, depot_close)
+        routing.AddVariableMaximizedByFinalizer(time_dimension.CumulVar(start))
+        routing.AddVariableMinimizedByFinalizer(time_dimension.CumulVar(end))
+    return time_dimension
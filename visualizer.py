@@ -1,6 +1,197 @@
+import json
 import folium
 from folium import plugins
-import pandas as pd
+from branca.element import MacroElement, Template, Element, JavascriptLink, CssLink
+
+ANT_PATH_JS = 'https://cdn.jsdelivr.net/npm/leaflet-ant-path@1.1.2/dist/leaflet-ant-path.min.js'
+
+COMPACT_MAP_CSS = """
+.stop-marker, .pickup-marker {
+    border-radius: 50%; color: white; font-weight: bold; font-size: 12px;
+    display: flex; align-items: center; justify-content: center;
+}
+.stop-marker { width: 25px; height: 25px; }
+.pickup-marker { width: 12px; height: 12px; background-color: #2a81cb; border: 2px solid white; }
+"""
+
+
+MARKER_CLUSTER_JS = 'https://cdnjs.cloudflare.com/ajax/libs/leaflet.markercluster/1.1.0/leaflet.markercluster.js'
+MARKER_CLUSTER_CSS = [
+    'https://cdnjs.cloudflare.com/ajax/libs/leaflet.markercluster/1.1.0/MarkerCluster.css',
+    'https://cdnjs.cloudflare.com/ajax/libs/leaflet.markercluster/1.1.0/MarkerCluster.Default.css',
+]
+
+# Marqueur d'une ligne [lat, lon, popup] du tableau de FastMarkerCluster
+CLUSTER_MARKER_CALLBACK = """
+function (row) {
+    return L.marker(new L.LatLng(row[0], row[1])).bindPopup(row[2]);
+}
+"""
+
+
+def point_popup(point):
+    """Contenu de la popup d'un point de ramassage"""
+    return (f"ID: {point['id']}<br>"
+            f"Nom: {point['name']}<br>"
+            f"Type: {point['poi_type']}<br>"
+            f"Passagers: {point['passengers']}<br>"
+            f"Distance: {point['distance_to_chateau']:.2f} km<br>"
+            f"Heure d'arrivée: {point['arrival_time']}")
+
+
+def _script_json(value):
+    """Sérialise en JSON compact insérable dans une balise <script>"""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+
+
+class CompactRouteLayer(MacroElement):
+    """
+    Calque unique regroupant les itinéraires et les marqueurs d'une carte.
+
+    Chaque chauffeur est tracé par un seul AntPath et tous les marqueurs
+    (points de ramassage et arrêts numérotés) forment une seule FeatureCollection
+    GeoJSON ; icônes et popups sont construits côté navigateur à partir de
+    classes CSS partagées, si bien que le HTML croît linéairement avec un petit
+    facteur constant par point.
+    """
+
+    _template = Template(u"""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var map = {{ this._parent.get_name() }};
+            var colors = {{ this.colors }};
+            {{ this.routes }}.forEach(function(route) {
+                L.polyline.antPath(route.points, {
+                    color: colors[route.driver % colors.length],
+                    pulseColor: '#FFFFFF', weight: 4, delay: 1000, dashArray: [10, 20]
+                }).bindPopup(route.popup).addTo(map);
+            });
+            L.geoJson({{ this.features }}, {
+                pointToLayer: function(feature, latlng) {
+                    var p = feature.properties;
+                    var stop = p.driver !== undefined;
+                    return L.marker(latlng, {icon: L.divIcon({
+                        className: '',
+                        html: stop
+                            ? '<div class="stop-marker driver-' + (p.driver % colors.length) + '">' + p.stop + '</div>'
+                            : '<div class="pickup-marker"></div>',
+                        iconSize: stop ? [30, 30] : [16, 16],
+                        iconAnchor: stop ? [15, 15] : [8, 8]
+                    })});
+                },
+                onEachFeature: function(feature, layer) {
+                    var p = feature.properties;
+                    layer.bindPopup(p.driver !== undefined
+                        ? 'Arrêt ' + p.stop + ': ' + p.name
+                        : 'ID: ' + p.id + '<br>Nom: ' + p.name + '<br>Type: ' + p.type
+                          + '<br>Passagers: ' + p.passengers + '<br>Distance: ' + p.distance
+                          + ' km<br>' + "Heure d'arrivée: " + p.arrival);
+                }
+            }).addTo(map);
+        })();
+        {% endmacro %}
+        """)
+
+    def __init__(self, points_data, routes, colors):
+        super().__init__()
+        self._name = 'CompactRouteLayer'
+        self.colors = json.dumps(colors)
+        self.css = COMPACT_MAP_CSS + ''.join(
+            f".driver-{i} {{ background-color: {color}; }}\n" for i, color in enumerate(colors))
+
+        features = [
+            {
+                'type': 'Feature',
+                'geometry': {'type': 'Point', 'coordinates': [round(point['lon'], 6), round(point['lat'], 6)]},
+                'properties': {
+                    'id': point['id'],
+                    'name': point['name'],
+                    'type': point['poi_type'],
+                    'passengers': point['passengers'],
+                    'distance': round(point['distance_to_chateau'], 2),
+                    'arrival': point['arrival_time']
+                }
+            }
+            for point in points_data
+        ]
+        route_layers = []
+        for vehicle_id, route in enumerate(routes or []):
+            if len(route['points']) <= 2:
+                continue
+            route_layers.append({
+                'driver': vehicle_id,
+                'points': [[round(lat, 6), round(lon, 6)] for lat, lon in route['points']],
+                'popup': f"Chauffeur {vehicle_id}: {route['distance']:.2f} km, {route['load']} passagers"
+            })
+            for i, point in enumerate(route['points'][1:-1], start=1):
+                features.append({
+                    'type': 'Feature',
+                    'geometry': {'type': 'Point', 'coordinates': [round(point[1], 6), round(point[0], 6)]},
+                    'properties': {'driver': vehicle_id, 'stop': i, 'name': route['stops'][i]['name']}
+                })
+
+        self.routes = _script_json(route_layers)
+        self.features = _script_json({'type': 'FeatureCollection', 'features': features})
+
+    def render(self, **kwargs):
+        figure = self.get_root()
+        figure.header.add_child(JavascriptLink(ANT_PATH_JS), name='antpath')
+        figure.header.add_child(
+            Element(f'<style>{self.css}</style>'), name='compact_route_css')
+        super().render(**kwargs)
+
+
+class ViewportPointsLayer(MacroElement):
+    """
+    Points de ramassage chargés à la demande pour l'emprise visible.
+
+    À chaque déplacement de la carte, les points de l'emprise sont demandés à
+    points_url?bbox=min_lat,min_lon,max_lat,max_lon et affichés dans un
+    MarkerCluster ; seule la réponse à la dernière requête est affichée.
+    """
+
+    _template = Template(u"""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var map = {{ this._parent.get_name() }};
+            var cluster = L.markerClusterGroup().addTo(map);
+            var request = 0;
+            function load() {
+                var bounds = map.getBounds();
+                var bbox = [bounds.getSouth(), bounds.getWest(), bounds.getNorth(), bounds.getEast()]
+                    .map(function(v) { return v.toFixed(6); }).join(',');
+                var current = ++request;
+                fetch({{ this.points_url }} + '?bbox=' + bbox)
+                    .then(function(response) { return response.json(); })
+                    .then(function(points) {
+                        if (current !== request) { return; }
+                        cluster.clearLayers();
+                        cluster.addLayers(points.map(function(p) {
+                            return L.marker([p.lat, p.lon]).bindPopup(
+                                'ID: ' + p.id + '<br>Nom: ' + p.name + '<br>Type: ' + p.poi_type
+                                + '<br>Passagers: ' + p.passengers
+                                + '<br>Distance: ' + Number(p.distance_to_chateau).toFixed(2)
+                                + ' km<br>' + "Heure d'arrivée: " + p.arrival_time);
+                        }));
+                    });
+            }
+            map.on('moveend', load);
+            load();
+        })();
+        {% endmacro %}
+        """)
+
+    def __init__(self, points_url):
+        super().__init__()
+        self._name = 'ViewportPointsLayer'
+        self.points_url = _script_json(points_url)
+
+    def render(self, **kwargs):
+        figure = self.get_root()
+        figure.header.add_child(JavascriptLink(MARKER_CLUSTER_JS), name='markerclusterjs')
+        for i, url in enumerate(MARKER_CLUSTER_CSS):
+            figure.header.add_child(CssLink(url), name=f'markerclustercss_{i}')
+        super().render(**kwargs)
 
 
 class RouteVisualizer:
@@ -10,9 +201,16 @@ class RouteVisualizer:
         self.colors = ['green', 'purple', 'orange',
                        'cadetblue', 'darkred', 'black', 'pink']
 
-    def create_map(self, points_data, routes=None):
+    def create_map(self, points_data, routes=None, compact=False, cluster=False, points_url=None):
         """
         Crée une carte Folium avec le dépôt et les points
+
+        En mode compact, les points et les itinéraires sont rendus par un seul
+        CompactRouteLayer au lieu d'un marqueur et d'un AntPath par élément.
+        En mode cluster, les points sont regroupés par un FastMarkerCluster
+        (un seul tableau JS). Si points_url est renseigné, les points ne sont pas
+        inclus dans la carte mais chargés par emprise visible (ViewportPointsLayer).
+        Dans ces deux modes, les itinéraires sont rendus en mode compact.
         """
         map_viz = folium.Map(
             location=[self.depot_coords[0], self.depot_coords[1]], zoom_start=13)
@@ -33,17 +231,27 @@ class RouteVisualizer:
             popup=f"Zone de {self.max_distance_km} km"
         ).add_to(map_viz)
 
-        for point in points_data:
-            popup_content = (f"ID: {point['id']}<br>"
-                             f"Nom: {point['name']}<br>"
-                             f"Type: {point['poi_type']}<br>"
-                             f"Passagers: {point['passengers']}<br>"
-                             f"Distance: {point['distance_to_chateau']:.2f} km<br>"
-                             f"Heure d'arrivée: {point['arrival_time']}")
+        if points_url or cluster:
+            if points_url:
+                ViewportPointsLayer(points_url).add_to(map_viz)
+            else:
+                plugins.FastMarkerCluster(
+                    [[point['lat'], point['lon'], point_popup(point)] for point in points_data],
+                    callback=CLUSTER_MARKER_CALLBACK,
+                    name='Points de ramassage'
+                ).add_to(map_viz)
+            if routes:
+                CompactRouteLayer([], routes, self.colors).add_to(map_viz)
+            return map_viz
+
+        if compact:
+            CompactRouteLayer(points_data, routes, self.colors).add_to(map_viz)
+            return map_viz
 
+        for point in points_data:
             folium.Marker(
                 location=[point['lat'], point['lon']],
-                popup=popup_content,
+                popup=point_popup(point),
                 icon=folium.Icon(color="blue", icon="user", prefix="fa")
             ).add_to(map_viz)
 
@@ -148,10 +356,8 @@ class RouteVisualizer:
                         'arrival_time': point['arrival_time']
                     })
 
-                previous_index = index
                 index = solution.Value(routing.NextVar(index))
-                route_distance += routing.GetArcCostForVehicle(
-                    previous_index, index, vehicle_id) / 1000
+                route_distance += int(data['distance_matrix'][node_index][manager.IndexToNode(index)]) / 1000
 
             route_points.append([self.depot_coords[0], self.depot_coords[1]])
             stop_sequence.append({